@@ -0,0 +1,120 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Databases created before migrations were introduced already have these
+tables (from Base.metadata.create_all), so each table is only created if
+it is missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing_tables:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("hashed_password", sa.String(), nullable=True),
+            sa.Column("full_name", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+        op.create_index("ix_users_id", "users", ["id"], unique=False)
+
+    if "documents" not in existing_tables:
+        op.create_table(
+            "documents",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("filename", sa.String(), nullable=True),
+            sa.Column("stored_filename", sa.String(), nullable=True),
+            sa.Column("document_type", sa.String(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("extracted_data", sa.JSON(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("stored_filename"),
+        )
+        op.create_index("ix_documents_id", "documents", ["id"], unique=False)
+
+    if "transactions" not in existing_tables:
+        op.create_table(
+            "transactions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("amount", sa.Float(), nullable=True),
+            sa.Column("category", sa.String(), nullable=True),
+            sa.Column("is_expense", sa.Boolean(), nullable=True),
+            sa.Column("is_flagged", sa.Boolean(), nullable=True),
+            sa.Column("flag_reason", sa.Text(), nullable=True),
+            sa.Column("document_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.ForeignKeyConstraint(["document_id"], ["documents.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_transactions_id", "transactions", ["id"], unique=False)
+
+    if "insights" not in existing_tables:
+        op.create_table(
+            "insights",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("insight_type", sa.String(), nullable=True),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("content", sa.Text(), nullable=True),
+            sa.Column("importance", sa.Integer(), nullable=True),
+            sa.Column("document_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.ForeignKeyConstraint(["document_id"], ["documents.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_insights_id", "insights", ["id"], unique=False)
+
+    if "disputes" not in existing_tables:
+        op.create_table(
+            "disputes",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("reason", sa.String(), nullable=True),
+            sa.Column("details", sa.Text(), nullable=True),
+            sa.Column("letter_content", sa.Text(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("document_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(["document_id"], ["documents.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_disputes_id", "disputes", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_disputes_id", table_name="disputes")
+    op.drop_table("disputes")
+    op.drop_index("ix_insights_id", table_name="insights")
+    op.drop_table("insights")
+    op.drop_index("ix_transactions_id", table_name="transactions")
+    op.drop_table("transactions")
+    op.drop_index("ix_documents_id", table_name="documents")
+    op.drop_table("documents")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
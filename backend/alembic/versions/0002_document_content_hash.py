@@ -0,0 +1,36 @@
+"""Add document content hash
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing_columns = {column["name"] for column in inspector.get_columns("documents")}
+    existing_indexes = {index["name"] for index in inspector.get_indexes("documents")}
+
+    if "content_hash" not in existing_columns:
+        op.add_column("documents", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    if "ix_documents_user_id_content_hash" not in existing_indexes:
+        op.create_index(
+            "ix_documents_user_id_content_hash",
+            "documents",
+            ["user_id", "content_hash", "document_type"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_user_id_content_hash", table_name="documents")
+    op.drop_column("documents", "content_hash")
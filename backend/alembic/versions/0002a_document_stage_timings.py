@@ -0,0 +1,27 @@
+"""Add document stage timings
+
+Revision ID: 0002a
+Revises: 0002
+Create Date: 2026-10-18 00:00:01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002a"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing_columns = {column["name"] for column in inspector.get_columns("documents")}
+
+    if "stage_timings" not in existing_columns:
+        op.add_column("documents", sa.Column("stage_timings", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "stage_timings")
@@ -0,0 +1,35 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: 0003
+Revises: 0002a
+Create Date: 2026-10-18 00:00:02
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_document_id_date",
+        "transactions",
+        ["document_id", "date"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_documents_user_id_created_at",
+        "documents",
+        ["user_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_user_id_created_at", table_name="documents")
+    op.drop_index("ix_transactions_document_id_date", table_name="transactions")
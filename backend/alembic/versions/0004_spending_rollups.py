@@ -0,0 +1,45 @@
+"""Add spending rollups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:03
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "spending_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("is_expense", sa.Boolean(), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("transaction_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "user_id", "month", "category", "is_expense", name="uq_spending_rollups_key"
+        ),
+    )
+    op.create_index(op.f("ix_spending_rollups_id"), "spending_rollups", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_spending_rollups_id"), table_name="spending_rollups")
+    op.drop_table("spending_rollups")
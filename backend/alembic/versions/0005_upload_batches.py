@@ -0,0 +1,50 @@
+"""Add upload batches
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:04
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload_batches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("document_type", sa.String(), nullable=True),
+        sa.Column("document_count", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_upload_batches_id"), "upload_batches", ["id"], unique=False)
+
+    op.add_column("documents", sa.Column("batch_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "fk_documents_batch_id_upload_batches", "documents", "upload_batches", ["batch_id"], ["id"]
+    )
+    op.create_index(
+        "ix_documents_batch_id_status", "documents", ["batch_id", "status"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_batch_id_status", table_name="documents")
+    op.drop_constraint("fk_documents_batch_id_upload_batches", "documents", type_="foreignkey")
+    op.drop_column("documents", "batch_id")
+    op.drop_index(op.f("ix_upload_batches_id"), table_name="upload_batches")
+    op.drop_table("upload_batches")
@@ -0,0 +1,40 @@
+"""Add pipeline stage checkpoints
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pipeline_checkpoints",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("document_id", sa.Integer(), nullable=False),
+        sa.Column("stage", sa.String(), nullable=False),
+        sa.Column("output", sa.JSON(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["document_id"], ["documents.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("document_id", "stage", name="uq_pipeline_checkpoints_document_stage"),
+    )
+    op.create_index(op.f("ix_pipeline_checkpoints_id"), "pipeline_checkpoints", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_pipeline_checkpoints_id"), table_name="pipeline_checkpoints")
+    op.drop_table("pipeline_checkpoints")
@@ -0,0 +1,42 @@
+"""Match the transaction indexes to the keyset pagination order
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:06
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_document_id_date_id",
+        "transactions",
+        ["document_id", "date", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_transactions_date_id",
+        "transactions",
+        ["date", "id"],
+        unique=False,
+    )
+    op.drop_index("ix_transactions_document_id_date", table_name="transactions")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_transactions_document_id_date",
+        "transactions",
+        ["document_id", "date"],
+        unique=False,
+    )
+    op.drop_index("ix_transactions_date_id", table_name="transactions")
+    op.drop_index("ix_transactions_document_id_date_id", table_name="transactions")
@@ -0,0 +1,231 @@
+"""
+Async counterparts of the read paths in app.crud, for use from async
+endpoints with an AsyncSession. Statements are shared with app.crud.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, schemas
+from app.core.document_events import apublish_document_event
+from app.core.principals import ainvalidate_principal
+from app.services.storage import StoredFile
+
+
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return (await db.scalars(select(models.User).where(models.User.email == email))).first()
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str):
+    db_user = models.User(
+        email=user.email,
+        hashed_password=hashed_password,
+        full_name=user.full_name,
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def update_user(
+    db: AsyncSession,
+    user_id: int,
+    user_update: schemas.UserUpdate,
+    hashed_password: Optional[str] = None,
+):
+    db_user = await get_user(db, user_id)
+    if db_user is None:
+        return None
+    for field, value in user_update.dict(exclude_unset=True, exclude={"password"}).items():
+        setattr(db_user, field, value)
+    if hashed_password:
+        db_user.hashed_password = hashed_password
+    await db.commit()
+    await db.refresh(db_user)
+    await ainvalidate_principal(user_id)
+    return db_user
+
+
+async def get_document(db: AsyncSession, document_id: int):
+    return await db.get(models.Document, document_id)
+
+
+async def get_document_detail(db: AsyncSession, document_id: int):
+    return (await db.scalars(crud.document_detail_statement(document_id))).first()
+
+
+async def get_user_documents(
+    db: AsyncSession, user_id: int, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[models.Document], Optional[str]]:
+    documents = (await db.scalars(crud.user_documents_statement(user_id, cursor, limit))).all()
+    return crud.paginate(documents, limit, "created_at")
+
+
+async def get_user_transactions(
+    db: AsyncSession,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    **filters,
+) -> Tuple[List[models.Transaction], Optional[str]]:
+    transactions = (
+        await db.scalars(crud.user_transactions_statement(user_id, cursor, limit, **filters))
+    ).all()
+    return crud.paginate(transactions, limit, "date")
+
+
+async def get_document_insights(db: AsyncSession, document_id: int):
+    return (
+        await db.scalars(select(models.Insight).where(models.Insight.document_id == document_id))
+    ).all()
+
+
+async def create_document(db: AsyncSession, document: schemas.DocumentCreate, user_id: int):
+    db_document = models.Document(
+        filename=document.filename,
+        stored_filename=document.stored_filename,
+        document_type=document.document_type,
+        description=document.description,
+        content_hash=document.content_hash,
+        user_id=user_id,
+    )
+    db.add(db_document)
+    await db.commit()
+    await db.refresh(db_document)
+    return db_document
+
+
+async def create_document_batch(
+    db: AsyncSession,
+    user_id: int,
+    document_type: str,
+    description: Optional[str],
+    files: List[StoredFile],
+) -> Tuple[models.UploadBatch, List[int]]:
+    """
+    Create an upload batch and a pending document per file, inserting the
+    documents in one statement. Returns the batch and the document ids in
+    the order of files.
+    """
+    batch = models.UploadBatch(user_id=user_id, document_type=document_type, document_count=len(files))
+    db.add(batch)
+    await db.flush()
+    document_ids = (
+        await db.scalars(
+            insert(models.Document).returning(models.Document.id, sort_by_parameter_order=True),
+            [
+                {
+                    "filename": stored.filename,
+                    "stored_filename": stored.stored_filename,
+                    "document_type": document_type,
+                    "description": description,
+                    "content_hash": stored.content_hash,
+                    "status": "pending",
+                    "user_id": user_id,
+                    "batch_id": batch.id,
+                }
+                for stored in files
+            ],
+        )
+    ).all()
+    await db.commit()
+    await db.refresh(batch)
+    return batch, list(document_ids)
+
+
+async def get_upload_batch(db: AsyncSession, batch_id: int):
+    return await db.get(models.UploadBatch, batch_id)
+
+
+async def get_batch_status_counts(db: AsyncSession, batch_id: int):
+    return dict((await db.execute(crud.batch_status_counts_statement(batch_id))).all())
+
+
+async def get_documents_by_content_hashes(
+    db: AsyncSession, user_id: int, content_hashes: List[str], document_type: str
+):
+    """
+    Return the first completed document per content hash.
+    """
+    documents = {}
+    for document in await db.scalars(
+        crud.documents_by_content_hashes_statement(user_id, content_hashes, document_type)
+    ):
+        documents.setdefault(document.content_hash, document)
+    return documents
+
+
+async def get_document_by_content_hash(
+    db: AsyncSession, user_id: int, content_hash: str, document_type: str
+):
+    return (
+        await db.scalars(crud.document_by_content_hash_statement(user_id, content_hash, document_type))
+    ).first()
+
+
+async def copy_document_results(db: AsyncSession, source: models.Document, document_id: int):
+    db_document = await get_document(db, document_id=document_id)
+    if not db_document:
+        return None
+
+    for statement in crud.copy_document_children_statements(source.id, document_id):
+        await db.execute(statement)
+    increments = crud.spending_rollup_increments(
+        db_document.user_id,
+        (await db.execute(crud.document_spending_rows_statement(source.id))).all(),
+    )
+    if increments:
+        await db.execute(
+            crud.spending_rollup_upsert_statement(db.get_bind().dialect.name, increments)
+        )
+
+    db_document.extracted_data = source.extracted_data
+    db_document.status = "completed"
+    await db.commit()
+    await db.refresh(db_document)
+    await apublish_document_event(db_document.user_id, document_id, "status", status="completed")
+    return db_document
+
+
+async def update_document_status(db: AsyncSession, document_id: int, status: str):
+    db_document = await get_document(db, document_id=document_id)
+    if db_document:
+        db_document.status = status
+        await db.commit()
+        await db.refresh(db_document)
+        await apublish_document_event(db_document.user_id, document_id, "status", status=status)
+    return db_document
+
+
+async def get_user_spending(db: AsyncSession, user_id: int, **filters):
+    return (await db.scalars(crud.user_spending_statement(user_id, **filters))).all()
+
+
+async def create_dispute(
+    db: AsyncSession, dispute: schemas.DisputeCreate, document_id: int, status: str = "draft"
+):
+    db_dispute = models.Dispute(
+        reason=dispute.reason,
+        details=dispute.details,
+        letter_content=dispute.letter_content,
+        status=status,
+        document_id=document_id,
+    )
+    db.add(db_dispute)
+    await db.commit()
+    await db.refresh(db_dispute)
+    return db_dispute
+
+
+async def get_dispute(db: AsyncSession, dispute_id: int):
+    return await db.get(models.Dispute, dispute_id)
+
+
+async def get_in_progress_documents(db: AsyncSession, user_id: int):
+    return (await db.execute(crud.in_progress_documents_statement(user_id))).all()
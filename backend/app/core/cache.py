@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import redis
+import redis.asyncio
+
+from app.core.config import settings
+from app.core.metrics import CACHE_EVICTIONS, CACHE_LOCAL_BYTES, CACHE_LOOKUPS
+
+_redis_client: Optional[redis.Redis] = None
+_async_redis_client: Optional[redis.asyncio.Redis] = None
+_redis_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """
+    Return the process-wide Redis client for settings.REDIS_URL.
+    """
+    global _redis_client
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                )
+    return _redis_client
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """
+    Return the process-wide asyncio Redis client for settings.REDIS_URL.
+
+    Unlike get_redis, reads have no socket timeout, so blocking reads
+    (XREAD BLOCK, pub/sub) can wait for as long as they ask to.
+    """
+    global _async_redis_client
+    if _async_redis_client is None:
+        _async_redis_client = redis.asyncio.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    return _async_redis_client
+
+
+class TieredCache:
+    """
+    Two-tier string cache: an in-process LRU in front of Redis.
+
+    The local tier evicts least recently used entries once either
+    max_entries or max_bytes is exceeded; both tiers expire entries after
+    ttl_seconds. Redis errors are logged and treated as misses, and Redis
+    is skipped for a short back-off afterwards, so a Redis outage only costs
+    the cache, never the request. Lookups, evictions and the local tier's
+    size are exported as Prometheus metrics labelled with the namespace.
+    """
+
+    REDIS_BACKOFF_SECONDS = 30.0
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: int,
+        max_entries: int,
+        max_bytes: int,
+        use_redis: bool = True,
+    ) -> None:
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.use_redis = use_redis
+
+        self._redis_retry_at = 0.0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _redis_available(self) -> bool:
+        return self.use_redis and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, action: str, error: Exception) -> None:
+        print(f"Error {action} {self.namespace} cache in Redis: {error}")
+        self._redis_retry_at = time.monotonic() + self.REDIS_BACKOFF_SECONDS
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    CACHE_LOOKUPS.labels(self.namespace, "local_hit").inc()
+                    return value
+                self._remove_local(key)
+
+        if self._redis_available():
+            try:
+                raw = get_redis().get(self._redis_key(key))
+            except redis.RedisError as e:
+                self._redis_failed("reading", e)
+                raw = None
+            if raw is not None:
+                value = raw.decode("utf-8")
+                self._set_local(key, value)
+                CACHE_LOOKUPS.labels(self.namespace, "redis_hit").inc()
+                return value
+
+        CACHE_LOOKUPS.labels(self.namespace, "miss").inc()
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        self._set_local(key, value)
+        if self._redis_available():
+            try:
+                get_redis().set(self._redis_key(key), value, ex=self.ttl_seconds)
+            except redis.RedisError as e:
+                self._redis_failed("writing", e)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove_local(key)
+        if self.use_redis:
+            try:
+                get_redis().delete(self._redis_key(key))
+            except redis.RedisError as e:
+                self._redis_failed("deleting from", e)
+
+    def clear(self) -> None:
+        """
+        Drop the local tier. Redis entries are left to expire.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        CACHE_LOCAL_BYTES.labels(self.namespace).set(0)
+
+    def _set_local(self, key: str, value: str) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove_local(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._size += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                CACHE_EVICTIONS.labels(self.namespace).inc()
+            CACHE_LOCAL_BYTES.labels(self.namespace).set(self._size)
+
+    def _remove_local(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+            CACHE_LOCAL_BYTES.labels(self.namespace).set(self._size)
@@ -37,20 +37,145 @@ class Settings(BaseSettings):
             return v
         return PostgresDsn.build(
             scheme="postgresql",
-            user=values.get("POSTGRES_USER"),
+            username=values.get("POSTGRES_USER"),
             password=values.get("POSTGRES_PASSWORD"),
             host=values.get("POSTGRES_SERVER"),
-            path=f"/{values.get('POSTGRES_DB') or ''}",
+            path=values.get("POSTGRES_DB") or "",
         )
 
+    @property
+    def ASYNC_SQLALCHEMY_DATABASE_URI(self) -> str:
+        _, _, rest = str(self.SQLALCHEMY_DATABASE_URI).partition("://")
+        return f"postgresql+asyncpg://{rest}"
+
+    # Connection pool, applied to both the sync and the async engine
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # Recycle connections before server or proxy idle timeouts close them
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
+
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+
+    # Celery
+    # Redis priorities run 0 (highest) to 9 (lowest); each lane maps to one step.
+    CELERY_DOCUMENT_QUEUE: str = "main-queue"
+    # Dispute letters have a worker of their own so a reader never waits on documents
+    CELERY_DISPUTE_QUEUE: str = "dispute-queue"
+    CELERY_INTERACTIVE_PRIORITY: int = 0
+    CELERY_BULK_PRIORITY: int = 6
     
     # Document Storage
     DOCUMENT_STORAGE_PATH: str = "/data/documents"
+    MAX_UPLOAD_SIZE_BYTES: int = 25 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024
+    # Allowance for multipart boundaries and form fields around the file itself
+    UPLOAD_FORM_OVERHEAD_BYTES: int = 64 * 1024
     
+    # Batch uploads: several files and/or ZIP archives in one request
+    BATCH_UPLOAD_MAX_FILES: int = 100
+    BATCH_UPLOAD_MAX_BYTES: int = 512 * 1024 * 1024
+
     # Anthropic API
     ANTHROPIC_API_KEY: str = ""
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    LLM_HTTP_MAX_CONNECTIONS: int = 20
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+
+    # PDF text extraction
+    PDF_EXTRACT_WORKERS: int = os.cpu_count() or 1
+    # PDFs of fewer than two ranges are read in-process, as are PDFs read in
+    # daemonic processes (Celery prefork children), which cannot start a pool
+    PDF_PAGES_PER_TASK: int = 16
+
+    # Image OCR
+    OCR_WORKERS: int = os.cpu_count() or 1
+    OCR_MAX_PENDING: int = 16
+    OCR_QUEUE_TIMEOUT_SECONDS: float = 60.0
+    # Images are downscaled to at most a page of this size at OCR_TARGET_DPI
+    OCR_TARGET_DPI: int = 300
+    OCR_PAGE_LONG_SIDE_INCHES: float = 11.0
+    OCR_CACHE_REDIS_ENABLED: bool = True
+    OCR_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30
+    OCR_CACHE_MAX_ENTRIES: int = 512
+    OCR_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # LLM document extraction
+    # Longer documents are split into chunks of this size and extracted concurrently
+    EXTRACTION_CHUNK_CHARS: int = 10000
+    EXTRACTION_MAX_CONCURRENCY: int = 4
+
+    # Estimated token budgets for the JSON payload embedded in each LLM prompt
+    PROMPT_BUDGET_TRANSACTIONS_TOKENS: int = 24000
+    PROMPT_BUDGET_INSIGHTS_TOKENS: int = 8000
+    PROMPT_BUDGET_DISPUTE_TOKENS: int = 6000
+
+    # Local statement line parser; below this confidence transactions come from the model
+    STATEMENT_PARSER_ENABLED: bool = True
+    STATEMENT_PARSER_MIN_CONFIDENCE: float = 0.85
+    STATEMENT_PARSER_MIN_TRANSACTIONS: int = 3
+
+    # Document processing pipeline
+    PIPELINE_MAX_WORKERS: int = 4
+    PIPELINE_TEXT_STAGE_TIMEOUT_SECONDS: float = 300.0
+    PIPELINE_LLM_STAGE_TIMEOUT_SECONDS: float = 300.0
+    PIPELINE_DB_STAGE_TIMEOUT_SECONDS: float = 60.0
+    PIPELINE_ANALYSIS_STAGE_TIMEOUT_SECONDS: float = 60.0
+    # Retries after transient model errors resume from the last checkpointed stage;
+    # the delay doubles from the base each attempt, up to the max, with jitter
+    PIPELINE_MAX_RETRIES: int = 5
+    PIPELINE_RETRY_BACKOFF_SECONDS: int = 15
+    PIPELINE_RETRY_BACKOFF_MAX_SECONDS: int = 600
+
+    # Transaction anomaly detection
+    ANOMALY_DUPLICATE_WINDOW_DAYS: float = 3.0
+    # Robust (median/MAD) z-score above which an expense is an outlier for its category
+    ANOMALY_OUTLIER_Z_SCORE: float = 3.5
+    ANOMALY_OUTLIER_MIN_GROUP_SIZE: int = 5
+    ANOMALY_MERCHANT_CHANGE_RATIO: float = 0.25
+    ANOMALY_SUMMARY_MAX_EXAMPLES: int = 5
+
+    # Dispute letters are generated by the worker and relayed to SSE clients
+    # through a Redis stream per dispute
+    DISPUTE_STREAM_TTL_SECONDS: int = 60 * 60
+    # How long a reader blocks for new tokens before a keep-alive and a status check
+    DISPUTE_STREAM_BLOCK_MS: int = 5000
+    DISPUTE_STREAM_MAX_SECONDS: float = 600.0
+
+    # Per-user document status streams; EventSource clients reconnect after
+    # the maximum duration, so connections are recycled
+    DOCUMENT_EVENTS_ENABLED: bool = True
+    DOCUMENT_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    DOCUMENT_EVENTS_MAX_SECONDS: float = 60 * 60
+
+    # Prometheus metrics; the worker serves them on WORKER_METRICS_PORT (0 disables)
+    METRICS_ENABLED: bool = True
+    WORKER_METRICS_PORT: int = 9808
+
+    # Password hashing pool; requests beyond workers + pending get a 503
+    PASSWORD_HASH_WORKERS: int = max((os.cpu_count() or 1) // 2, 1)
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+
+    # Authenticated user cache; the TTL bounds how long a change made outside
+    # crud.update_user / crud.deactivate_user can go unnoticed
+    AUTH_PRINCIPAL_CACHE_ENABLED: bool = True
+    AUTH_PRINCIPAL_CACHE_REDIS_ENABLED: bool = True
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 4096
+    AUTH_PRINCIPAL_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_REDIS_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,63 @@
+"""
+Document status and stage-progress events, published on a Redis pub/sub
+channel per user so clients can follow processing without polling.
+
+Pub/sub is fire-and-forget: a subscriber only sees events published while
+it is connected, so readers start from a snapshot of in-flight documents.
+"""
+import json
+import time
+from typing import Any, Dict
+
+import redis
+
+from app.core.cache import get_async_redis, get_redis
+from app.core.config import settings
+
+# After a Redis error, skip publishing for a while rather than pay a
+# connection timeout on every status change
+REDIS_BACKOFF_SECONDS = 30.0
+_redis_retry_at = 0.0
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}:documents"
+
+
+def _message(event_type: str, document_id: int, data: Dict[str, Any]) -> str:
+    return json.dumps({"type": event_type, "document_id": document_id, **data})
+
+
+def publish_document_event(
+    user_id: int, document_id: int, event_type: str, **data: Any
+) -> None:
+    """
+    Publish a "status" or "stage" event for a document. Redis errors are
+    logged and ignored; clients can always fall back to GET /documents/{id}.
+    """
+    global _redis_retry_at
+    if not settings.DOCUMENT_EVENTS_ENABLED or time.monotonic() < _redis_retry_at:
+        return
+    try:
+        get_redis().publish(user_channel(user_id), _message(event_type, document_id, data))
+    except redis.RedisError as e:
+        print(f"Document event error for document {document_id}: {e}")
+        _redis_retry_at = time.monotonic() + REDIS_BACKOFF_SECONDS
+
+
+async def apublish_document_event(
+    user_id: int, document_id: int, event_type: str, **data: Any
+) -> None:
+    """
+    publish_document_event for async callers.
+    """
+    global _redis_retry_at
+    if not settings.DOCUMENT_EVENTS_ENABLED or time.monotonic() < _redis_retry_at:
+        return
+    try:
+        await get_async_redis().publish(
+            user_channel(user_id), _message(event_type, document_id, data)
+        )
+    except (redis.RedisError, OSError) as e:
+        print(f"Document event error for document {document_id}: {e}")
+        _redis_retry_at = time.monotonic() + REDIS_BACKOFF_SECONDS
@@ -0,0 +1,278 @@
+"""
+Prometheus metrics for the API and the Celery worker.
+
+Counters and histograms are recorded where the work happens, including in
+the services that run in Celery's prefork children. Only queue depth and
+connection pool usage are read when metrics are scraped.
+
+Processes that fork (gunicorn workers, Celery prefork) must share a
+PROMETHEUS_MULTIPROC_DIR, emptied at startup, so one scrape covers every
+child. Scrape-time collectors then report on the serving process only.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+from uuid import UUID
+
+import redis
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from app.core.config import settings
+
+# Buckets for work that takes seconds to minutes rather than milliseconds
+LONG_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, float("inf"))
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "fingenius_http_request_duration_seconds",
+    "Time until the response starts, per route",
+    ["method", "route", "status"],
+)
+PIPELINE_STAGE_SECONDS = Histogram(
+    "fingenius_pipeline_stage_duration_seconds",
+    "Wall-clock time of document pipeline stages",
+    ["stage"],
+    buckets=LONG_BUCKETS,
+)
+DOCUMENTS_PROCESSED = Counter(
+    "fingenius_documents_processed_total",
+    "Documents processed by the worker, by outcome (completed, failed, retrying)",
+    ["status"],
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "fingenius_llm_request_duration_seconds",
+    "Latency of model calls; cached completions are not counted",
+    ["model", "outcome"],
+    buckets=LONG_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "fingenius_llm_tokens_total",
+    "Tokens reported by the API for model calls; streamed calls report none",
+    ["model", "direction"],
+)
+TEXT_EXTRACTION_SECONDS = Histogram(
+    "fingenius_text_extraction_duration_seconds",
+    "Time to extract the text of a document, by kind (pdf, image)",
+    ["kind"],
+    buckets=LONG_BUCKETS,
+)
+TEXT_EXTRACTION_PAGES = Counter(
+    "fingenius_text_extraction_pages_total",
+    "PDF pages and OCR images whose text was extracted",
+    ["kind"],
+)
+OCR_TESSERACT_SECONDS = Histogram(
+    "fingenius_ocr_tesseract_duration_seconds",
+    "Time spent in Tesseract per image, excluding cache hits",
+    buckets=LONG_BUCKETS,
+)
+TRANSACTION_EXTRACTIONS = Counter(
+    "fingenius_transaction_extractions_total",
+    "Transaction extractions by path (fast_path: local statement parser)",
+    ["path"],
+)
+PROMPT_PAYLOAD_TOKENS = Counter(
+    "fingenius_prompt_payload_tokens_total",
+    "Estimated prompt payload tokens before and after compaction",
+    ["stage", "phase"],
+)
+PROMPT_PAYLOADS_TRIMMED = Counter(
+    "fingenius_prompt_payloads_trimmed_total",
+    "Prompt payloads that had to be trimmed to their token budget",
+    ["stage"],
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "fingenius_password_hash_duration_seconds",
+    "Time spent in bcrypt",
+    ["operation"],
+)
+CACHE_LOOKUPS = Counter(
+    "fingenius_cache_lookups_total",
+    "Cache lookups by result (local_hit, redis_hit, miss)",
+    ["cache", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "fingenius_cache_evictions_total",
+    "Entries evicted from the in-process cache tier",
+    ["cache"],
+)
+CACHE_LOCAL_BYTES = Gauge(
+    "fingenius_cache_local_bytes",
+    "Size of the in-process cache tier, summed over live processes",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+
+
+def observe_text_extraction(kind: str, pages: int, seconds: float) -> None:
+    TEXT_EXTRACTION_SECONDS.labels(kind).observe(seconds)
+    TEXT_EXTRACTION_PAGES.labels(kind).inc(pages)
+
+
+def observe_document_processed(status: str, stage_timings: Dict[str, float]) -> None:
+    DOCUMENTS_PROCESSED.labels(status).inc()
+    for stage, seconds in stage_timings.items():
+        PIPELINE_STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def _usage_tokens(usage: Any, field: str) -> Optional[int]:
+    if isinstance(usage, dict):
+        return usage.get(field)
+    return getattr(usage, field, None)
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    LangChain callback that records latency and token usage of one model.
+    """
+
+    run_inline = True
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self._started: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID) -> None:
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id: UUID, outcome: str) -> None:
+        with self._lock:
+            started_at = self._started.pop(run_id, None)
+        if started_at is not None:
+            LLM_REQUEST_SECONDS.labels(self.model, outcome).observe(time.perf_counter() - started_at)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "success")
+        usage = (response.llm_output or {}).get("usage")
+        for direction in ("input", "output"):
+            tokens = _usage_tokens(usage, f"{direction}_tokens")
+            if tokens:
+                LLM_TOKENS.labels(self.model, direction).inc(tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+
+class ScrapeTimeCollector(Collector):
+    """
+    A collector that reads its values when scraped. describe() is empty so
+    registering it does not run collect() at import time.
+    """
+
+    def describe(self) -> Iterator[Metric]:
+        return iter(())
+
+
+class QueueDepthCollector(ScrapeTimeCollector):
+    """
+    Length of the Celery document and dispute queues per priority, read
+    from Redis.
+    """
+
+    def collect(self) -> Iterator[Metric]:
+        # Imported here: the cache module records its own metrics from this one
+        from app.core.cache import get_redis
+
+        queues = [settings.CELERY_DOCUMENT_QUEUE, settings.CELERY_DISPUTE_QUEUE]
+        # Kombu keeps a list per priority step; step 0 uses the bare queue name
+        keys = [
+            (queue, priority, queue if priority == 0 else f"{queue}:{priority}")
+            for queue in queues
+            for priority in range(10)
+        ]
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for _, _, key in keys:
+                pipe.llen(key)
+            lengths = pipe.execute()
+        except redis.RedisError as e:
+            print(f"Error reading Celery queue depth: {e}")
+            return
+        metric = GaugeMetricFamily(
+            "fingenius_celery_queue_length",
+            "Tasks waiting in the Celery queues",
+            labels=["queue", "priority"],
+        )
+        for (queue, priority, _), length in zip(keys, lengths):
+            metric.add_metric([queue, str(priority)], length)
+        yield metric
+
+
+class DatabasePoolCollector(ScrapeTimeCollector):
+    """
+    Connections of the sync and async engines' pools in this process.
+    """
+
+    def collect(self) -> Iterator[Metric]:
+        from app.database import async_engine, engine
+
+        metric = GaugeMetricFamily(
+            "fingenius_db_pool_connections",
+            "Database pool connections in this process",
+            labels=["engine", "state"],
+        )
+        for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+            if not hasattr(pool, "checkedout"):
+                continue
+            metric.add_metric([name, "checked_out"], pool.checkedout())
+            metric.add_metric([name, "idle"], pool.checkedin())
+            metric.add_metric([name, "overflow"], max(pool.overflow(), 0))
+            metric.add_metric([name, "size"], pool.size())
+        yield metric
+
+
+PROCESS_COLLECTORS = [QueueDepthCollector(), DatabasePoolCollector()]
+
+for _collector in PROCESS_COLLECTORS:
+    REGISTRY.register(_collector)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    Return the registry to expose: the default one, or in multiprocess mode
+    one that merges every process's files.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in PROCESS_COLLECTORS:
+        registry.register(collector)
+    return registry
+
+
+def render_metrics() -> bytes:
+    return generate_latest(metrics_registry())
+
+
+def start_metrics_server(port: int) -> None:
+    """
+    Serve /metrics on port from a background thread, for processes without
+    an HTTP app of their own (the Celery worker).
+    """
+    start_http_server(port, registry=metrics_registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class PoolSaturatedError(Exception):
+    """
+    Raised when a bounded pool has no free slot for another task.
+    """
+
+
+def can_start_processes() -> bool:
+    """
+    Whether this process may start child processes; daemonic ones, such as
+    Celery prefork children, may not.
+    """
+    return not multiprocessing.current_process().daemon
+
+
+class BoundedPool:
+    """
+    A lazily started executor that admits at most max_workers running plus
+    max_pending queued tasks.
+
+    The executor is created on first use in the process that uses it, so
+    the pool is safe to declare at import time in code that is later forked
+    (Celery prefork, gunicorn), and it is rebuilt if it breaks.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int) -> None:
+        self.name = name
+        self.max_workers = max(max_workers, 1)
+        self.max_pending = max(max_pending, 0)
+        self._executor: Optional[Executor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+
+    def _new_executor(self) -> Executor:
+        raise NotImplementedError
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = self._new_executor()
+                self._pid = os.getpid()
+            return self._executor
+
+    def _reset(self, executor: Executor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        block: bool = True,
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """
+        Submit fn(*args) to the pool.
+
+        With block=False, or once timeout seconds pass without a free slot,
+        PoolSaturatedError is raised instead of queueing the task.
+        """
+        if block:
+            acquired = self._slots.acquire(timeout=timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            raise PoolSaturatedError(f"The {self.name} pool is saturated")
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenExecutor:
+            self._reset(executor)
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except BaseException:
+                self._slots.release()
+                raise
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class BoundedProcessPool(BoundedPool):
+    """
+    A bounded pool of worker processes, for CPU-bound Python code.
+
+    Processes cannot be started from a daemonic process such as a Celery
+    prefork child; check can_start_processes first, or use a
+    BoundedThreadPool for work that runs there.
+    """
+
+    def _new_executor(self) -> Executor:
+        return ProcessPoolExecutor(max_workers=self.max_workers)
+
+
+class BoundedThreadPool(BoundedPool):
+    """
+    A bounded pool of threads, for work that waits on I/O or subprocesses.
+    """
+
+    def _new_executor(self) -> Executor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
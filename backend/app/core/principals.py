@@ -0,0 +1,78 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Optional
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app import models
+
+principal_cache = TieredCache(
+    namespace="principal",
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+    max_bytes=settings.AUTH_PRINCIPAL_CACHE_MAX_BYTES,
+    use_redis=settings.AUTH_PRINCIPAL_CACHE_REDIS_ENABLED,
+)
+
+
+def get_cached_principal(user_id: int) -> Optional[models.User]:
+    """
+    Return a detached User for user_id from the cache, or None on a miss.
+
+    The returned object is not attached to any session and carries no
+    password hash; it is only meant to identify the caller.
+    """
+    if not settings.AUTH_PRINCIPAL_CACHE_ENABLED:
+        return None
+    raw = principal_cache.get(str(user_id))
+    if raw is None:
+        return None
+    data = json.loads(raw)
+    return models.User(
+        id=data["id"],
+        email=data["email"],
+        full_name=data["full_name"],
+        is_active=data["is_active"],
+        created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+    )
+
+
+def cache_principal(user: models.User) -> None:
+    if not settings.AUTH_PRINCIPAL_CACHE_ENABLED:
+        return
+    principal_cache.set(
+        str(user.id),
+        json.dumps(
+            {
+                "id": user.id,
+                "email": user.email,
+                "full_name": user.full_name,
+                "is_active": user.is_active,
+                "created_at": user.created_at.isoformat() if user.created_at else None,
+            }
+        ),
+    )
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    Drop user_id from both cache tiers; call after any change to the user row.
+    """
+    principal_cache.delete(str(user_id))
+
+
+# The cache's Redis tier is a blocking client; async callers use these so a
+# slow or unreachable Redis never stalls the event loop.
+
+
+async def aget_cached_principal(user_id: int) -> Optional[models.User]:
+    return await asyncio.to_thread(get_cached_principal, user_id)
+
+
+async def acache_principal(user: models.User) -> None:
+    await asyncio.to_thread(cache_principal, user)
+
+
+async def ainvalidate_principal(user_id: int) -> None:
+    await asyncio.to_thread(invalidate_principal, user_id)
@@ -1,19 +1,30 @@
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Optional, Tuple, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.database import get_db
-from app import crud, models, schemas
+from app.core.metrics import PASSWORD_HASH_SECONDS
+from app.core.pools import BoundedProcessPool
+from app.core.principals import acache_principal, aget_cached_principal
+from app.database import get_async_db
+from app import async_crud, models, schemas
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# bcrypt is deliberately CPU-bound; keep it off the request threadpool
+password_pool = BoundedProcessPool(
+    "password",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -34,8 +45,44 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _timed_password_hash(password: str) -> Tuple[str, float]:
+    started_at = time.perf_counter()
+    hashed_password = get_password_hash(password)
+    return hashed_password, time.perf_counter() - started_at
+
+
+def _timed_verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, float]:
+    started_at = time.perf_counter()
+    verified = verify_password(plain_password, hashed_password)
+    return verified, time.perf_counter() - started_at
+
+
+async def hash_password_in_pool(password: str) -> str:
+    """
+    Hash password in the password pool; raises PoolSaturatedError when the
+    pool and its queue are full rather than waiting for a slot.
+    """
+    future = password_pool.submit(_timed_password_hash, password, block=False)
+    hashed_password, seconds = await asyncio.wrap_future(future)
+    PASSWORD_HASH_SECONDS.labels("hash").observe(seconds)
+    return hashed_password
+
+
+async def verify_password_in_pool(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password in the password pool; raises PoolSaturatedError like
+    hash_password_in_pool.
+    """
+    future = password_pool.submit(
+        _timed_verify_password, plain_password, hashed_password, block=False
+    )
+    verified, seconds = await asyncio.wrap_future(future)
+    PASSWORD_HASH_SECONDS.labels("verify").observe(seconds)
+    return verified
+
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -47,10 +94,22 @@ async def get_current_user(
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = schemas.TokenData(email=email)
-    except JWTError:
+        token_data = schemas.TokenData(email=email, user_id=payload.get("uid"))
+    except (JWTError, ValueError):
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=token_data.email)
-    if user is None:
+
+    # Tokens issued before the user id was embedded fall back to the email lookup
+    user = None
+    if token_data.user_id is not None:
+        user = await aget_cached_principal(token_data.user_id)
+        if user is None:
+            user = await async_crud.get_user(db, token_data.user_id)
+            if user is not None:
+                await acache_principal(user)
+    else:
+        user = await async_crud.get_user_by_email(db, email=token_data.email)
+    if user is None or user.email != token_data.email:
         raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return user
@@ -0,0 +1,19 @@
+import json
+from typing import Any, Optional
+
+# Keep nginx and other proxies from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    """
+    Encode one server-sent event with a JSON payload.
+    """
+    message = ""
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def format_sse_comment(comment: str = "keep-alive") -> str:
+    return f": {comment}\n\n"
@@ -1,9 +1,256 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
-
+from datetime import date, datetime, timezone
+from sqlalchemy import Insert, Select, delete, func, insert, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Tuple
+
+from app.core.document_events import publish_document_event
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.principals import invalidate_principal
 from app.core.security import get_password_hash, verify_password
 from app import models, schemas
 
+# Statement builders shared by these sync functions and their async
+# counterparts in app.async_crud.
+
+
+def document_detail_statement(document_id: int) -> Select:
+    return (
+        select(models.Document)
+        .options(
+            selectinload(models.Document.transactions),
+            selectinload(models.Document.insights),
+            selectinload(models.Document.disputes),
+        )
+        .where(models.Document.id == document_id)
+    )
+
+
+def user_documents_statement(user_id: int, cursor: Optional[str], limit: int) -> Select:
+    statement = select(models.Document).where(models.Document.user_id == user_id)
+    if cursor:
+        created_at, document_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(models.Document.created_at, models.Document.id) < (created_at, document_id)
+        )
+    # One extra row tells paginate() whether another page exists
+    return statement.order_by(
+        models.Document.created_at.desc(), models.Document.id.desc()
+    ).limit(limit + 1)
+
+
+def user_transactions_statement(
+    user_id: int,
+    cursor: Optional[str],
+    limit: int,
+    document_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    is_flagged: Optional[bool] = None,
+) -> Select:
+    statement = (
+        select(models.Transaction)
+        .join(models.Document, models.Transaction.document_id == models.Document.id)
+        .where(models.Document.user_id == user_id)
+    )
+    if document_id is not None:
+        statement = statement.where(models.Transaction.document_id == document_id)
+    if date_from is not None:
+        statement = statement.where(models.Transaction.date >= date_from)
+    if date_to is not None:
+        statement = statement.where(models.Transaction.date <= date_to)
+    if category is not None:
+        statement = statement.where(models.Transaction.category == category)
+    if min_amount is not None:
+        statement = statement.where(models.Transaction.amount >= min_amount)
+    if max_amount is not None:
+        statement = statement.where(models.Transaction.amount <= max_amount)
+    if is_flagged is not None:
+        statement = statement.where(models.Transaction.is_flagged == is_flagged)
+    if cursor:
+        date, transaction_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(models.Transaction.date, models.Transaction.id) < (date, transaction_id)
+        )
+    return statement.order_by(
+        models.Transaction.date.desc(), models.Transaction.id.desc()
+    ).limit(limit + 1)
+
+
+def paginate(rows: list, limit: int, sort_attribute: str) -> Tuple[list, Optional[str]]:
+    """
+    Trim rows fetched with limit + 1 to one page and build the next cursor.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(getattr(rows[-1], sort_attribute), rows[-1].id)
+
+
+def document_by_content_hash_statement(user_id: int, content_hash: str, document_type: str) -> Select:
+    return (
+        select(models.Document)
+        .where(
+            models.Document.user_id == user_id,
+            models.Document.content_hash == content_hash,
+            models.Document.document_type == document_type,
+            models.Document.status == "completed",
+        )
+        .order_by(models.Document.id)
+        .limit(1)
+    )
+
+
+def documents_by_content_hashes_statement(
+    user_id: int, content_hashes: List[str], document_type: str
+) -> Select:
+    return (
+        select(models.Document)
+        .where(
+            models.Document.user_id == user_id,
+            models.Document.content_hash.in_(content_hashes),
+            models.Document.document_type == document_type,
+            models.Document.status == "completed",
+        )
+        .order_by(models.Document.id)
+    )
+
+
+def batch_status_counts_statement(batch_id: int) -> Select:
+    return (
+        select(models.Document.status, func.count())
+        .where(models.Document.batch_id == batch_id)
+        .group_by(models.Document.status)
+    )
+
+
+def copy_document_children_statements(source_id: int, document_id: int) -> List[Insert]:
+    transaction_columns = [
+        "date", "description", "amount", "category",
+        "is_expense", "is_flagged", "flag_reason",
+    ]
+    insight_columns = ["insight_type", "title", "content", "importance"]
+    return [
+        insert(models.Transaction).from_select(
+            transaction_columns + ["document_id"],
+            select(
+                *[getattr(models.Transaction, column) for column in transaction_columns],
+                literal(document_id),
+            ).where(models.Transaction.document_id == source_id),
+        ),
+        insert(models.Insight).from_select(
+            insight_columns + ["document_id"],
+            select(
+                *[getattr(models.Insight, column) for column in insight_columns],
+                literal(document_id),
+            ).where(models.Insight.document_id == source_id),
+        ),
+    ]
+
+
+UNCATEGORIZED = "uncategorized"
+
+
+def spending_month(value: datetime) -> date:
+    """
+    Return the rollup month (first day, UTC) of a transaction date.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date().replace(day=1)
+
+
+def spending_rollup_increments(user_id: int, transactions) -> List[dict]:
+    """
+    Sum transactions (anything with date, amount, category and is_expense)
+    per rollup key, as rows for spending_rollup_upsert_statement.
+    """
+    totals = {}
+    for transaction in transactions:
+        if transaction.date is None or transaction.amount is None:
+            continue
+        key = (
+            spending_month(transaction.date),
+            transaction.category or UNCATEGORIZED,
+            bool(transaction.is_expense),
+        )
+        total, count = totals.get(key, (0.0, 0))
+        totals[key] = (total + transaction.amount, count + 1)
+    return [
+        {
+            "user_id": user_id,
+            "month": month,
+            "category": category,
+            "is_expense": is_expense,
+            "total_amount": total,
+            "transaction_count": count,
+        }
+        for (month, category, is_expense), (total, count) in totals.items()
+    ]
+
+
+def spending_rollup_upsert_statement(dialect_name: str, increments: List[dict]) -> Insert:
+    """
+    Add increments onto the existing rollup rows, creating missing ones.
+    """
+    dialect_insert = sqlite_insert if dialect_name == "sqlite" else postgresql_insert
+    statement = dialect_insert(models.SpendingRollup).values(increments)
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "month", "category", "is_expense"],
+        set_={
+            "total_amount": models.SpendingRollup.total_amount + statement.excluded.total_amount,
+            "transaction_count": (
+                models.SpendingRollup.transaction_count + statement.excluded.transaction_count
+            ),
+            "updated_at": func.now(),
+        },
+    )
+
+
+def pipeline_checkpoint_statement(
+    dialect_name: str, document_id: int, stage: str, output=None
+) -> Insert:
+    """
+    Record stage as completed for a document, keeping a checkpoint that is
+    already there.
+    """
+    dialect_insert = sqlite_insert if dialect_name == "sqlite" else postgresql_insert
+    return dialect_insert(models.PipelineCheckpoint).values(
+        document_id=document_id, stage=stage, output=output
+    ).on_conflict_do_nothing(index_elements=["document_id", "stage"])
+
+
+def document_spending_rows_statement(document_id: int) -> Select:
+    return select(
+        models.Transaction.date,
+        models.Transaction.amount,
+        models.Transaction.category,
+        models.Transaction.is_expense,
+    ).where(models.Transaction.document_id == document_id)
+
+
+def user_spending_statement(
+    user_id: int,
+    month_from: Optional[date] = None,
+    month_to: Optional[date] = None,
+    category: Optional[str] = None,
+    is_expense: Optional[bool] = None,
+) -> Select:
+    statement = select(models.SpendingRollup).where(models.SpendingRollup.user_id == user_id)
+    if month_from is not None:
+        statement = statement.where(models.SpendingRollup.month >= month_from.replace(day=1))
+    if month_to is not None:
+        statement = statement.where(models.SpendingRollup.month <= month_to)
+    if category is not None:
+        statement = statement.where(models.SpendingRollup.category == category)
+    if is_expense is not None:
+        statement = statement.where(models.SpendingRollup.is_expense == is_expense)
+    return statement.order_by(models.SpendingRollup.month, models.SpendingRollup.category)
+
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -30,6 +277,33 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 
+def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
+    db_user = get_user(db, user_id)
+    if db_user is None:
+        return None
+    updates = user_update.dict(exclude_unset=True)
+    password = updates.pop("password", None)
+    if password:
+        db_user.hashed_password = get_password_hash(password)
+    for field, value in updates.items():
+        setattr(db_user, field, value)
+    db.commit()
+    db.refresh(db_user)
+    invalidate_principal(user_id)
+    return db_user
+
+
+def deactivate_user(db: Session, user_id: int):
+    db_user = get_user(db, user_id)
+    if db_user is None:
+        return None
+    db_user.is_active = False
+    db.commit()
+    db.refresh(db_user)
+    invalidate_principal(user_id)
+    return db_user
+
+
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email=email)
     if not user:
@@ -43,14 +317,24 @@ def get_document(db: Session, document_id: int):
     return db.query(models.Document).filter(models.Document.id == document_id).first()
 
 
-def get_user_documents(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return (
-        db.query(models.Document)
-        .filter(models.Document.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+def get_document_detail(db: Session, document_id: int):
+    """
+    Load a document together with its transactions, insights and disputes
+    in a fixed four queries instead of one lazy load per relationship.
+    """
+    return db.scalars(document_detail_statement(document_id)).first()
+
+
+def get_user_documents(
+    db: Session, user_id: int, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[models.Document], Optional[str]]:
+    """
+    Return one page of a user's documents, newest first, and the cursor of
+    the next page. Keyset pagination on (created_at, id) keeps every page an
+    index range scan no matter how deep the user pages.
+    """
+    documents = db.scalars(user_documents_statement(user_id, cursor, limit)).all()
+    return paginate(documents, limit, "created_at")
 
 
 def create_document(db: Session, document: schemas.DocumentCreate, user_id: int):
@@ -59,6 +343,7 @@ def create_document(db: Session, document: schemas.DocumentCreate, user_id: int)
         stored_filename=document.stored_filename,
         document_type=document.document_type,
         description=document.description,
+        content_hash=document.content_hash,
         user_id=user_id,
     )
     db.add(db_document)
@@ -67,24 +352,110 @@ def create_document(db: Session, document: schemas.DocumentCreate, user_id: int)
     return db_document
 
 
+def get_document_by_content_hash(db: Session, user_id: int, content_hash: str, document_type: str):
+    """
+    Find a processed document of the same type with identical uploaded bytes.
+    """
+    return db.scalars(document_by_content_hash_statement(user_id, content_hash, document_type)).first()
+
+
+def copy_document_results(db: Session, source: models.Document, document_id: int):
+    """
+    Reuse the extracted data, transactions and insights of an already
+    processed document for another document, copying the child rows with
+    INSERT ... SELECT so they never round-trip through Python.
+    """
+    db_document = get_document(db, document_id=document_id)
+    if not db_document:
+        return None
+
+    for statement in copy_document_children_statements(source.id, document_id):
+        db.execute(statement)
+    apply_spending_rollups(
+        db, db_document.user_id, db.execute(document_spending_rows_statement(source.id)).all()
+    )
+
+    db_document.extracted_data = source.extracted_data
+    db_document.status = "completed"
+    db.commit()
+    db.refresh(db_document)
+    return db_document
+
+
 def update_document_status(db: Session, document_id: int, status: str):
     db_document = get_document(db, document_id=document_id)
     if db_document:
         db_document.status = status
         db.commit()
         db.refresh(db_document)
+        publish_document_event(db_document.user_id, document_id, "status", status=status)
     return db_document
 
 
+def in_progress_documents_statement(user_id: int) -> Select:
+    return select(models.Document.id, models.Document.status).where(
+        models.Document.user_id == user_id,
+        models.Document.status.in_(["pending", "processing"]),
+    )
+
+
 def update_document_extracted_data(db: Session, document_id: int, extracted_data: dict):
+    """
+    Set a document's extracted data without committing, like the bulk
+    create helpers.
+    """
     db_document = get_document(db, document_id=document_id)
     if db_document:
         db_document.extracted_data = extracted_data
+    return db_document
+
+
+def update_document_stage_timings(db: Session, document_id: int, stage_timings: dict):
+    db_document = get_document(db, document_id=document_id)
+    if db_document:
+        db_document.stage_timings = stage_timings
         db.commit()
         db.refresh(db_document)
     return db_document
 
 
+def get_pipeline_checkpoints(db: Session, document_id: int) -> dict:
+    """
+    Return the outputs of the pipeline stages a document has completed,
+    keyed by stage name.
+    """
+    return dict(
+        db.execute(
+            select(models.PipelineCheckpoint.stage, models.PipelineCheckpoint.output).where(
+                models.PipelineCheckpoint.document_id == document_id
+            )
+        ).all()
+    )
+
+
+def add_pipeline_checkpoint(db: Session, document_id: int, stage: str, output=None) -> int:
+    """
+    Record a completed stage without committing, so that it commits together
+    with whatever the stage wrote. Returns 0 if the stage was already recorded.
+    """
+    result = db.execute(
+        pipeline_checkpoint_statement(db.get_bind().dialect.name, document_id, stage, output)
+    )
+    return result.rowcount
+
+
+def save_pipeline_checkpoint(db: Session, document_id: int, stage: str, output=None) -> None:
+    add_pipeline_checkpoint(db, document_id, stage, output)
+    db.commit()
+
+
+def delete_pipeline_checkpoints(db: Session, document_id: int) -> None:
+    db.execute(
+        delete(models.PipelineCheckpoint).where(models.PipelineCheckpoint.document_id == document_id)
+    )
+    db.commit()
+
+
 def create_transaction(db: Session, transaction: schemas.TransactionCreate):
     db_transaction = models.Transaction(
         date=transaction.date,
@@ -97,11 +468,72 @@ def create_transaction(db: Session, transaction: schemas.TransactionCreate):
         document_id=transaction.document_id,
     )
     db.add(db_transaction)
+    db.flush()
+    apply_spending_rollups(db, db_transaction.document.user_id, [db_transaction])
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
 
 
+def bulk_create_transactions(db: Session, transactions: List[schemas.TransactionCreate]):
+    """
+    Insert many transactions with one batched INSERT and fold them into the
+    owners' spending rollups, without committing: the caller commits, so a
+    document's rows land in the same transaction as its other writes.
+    """
+    if not transactions:
+        return []
+    db_transactions = db.scalars(
+        insert(models.Transaction).returning(models.Transaction),
+        [transaction.dict() for transaction in transactions],
+    ).all()
+
+    document_ids = {transaction.document_id for transaction in db_transactions}
+    owners = dict(
+        db.execute(
+            select(models.Document.id, models.Document.user_id).where(
+                models.Document.id.in_(document_ids)
+            )
+        ).all()
+    )
+    by_user = {}
+    for transaction in db_transactions:
+        by_user.setdefault(owners.get(transaction.document_id), []).append(transaction)
+    for user_id, user_transactions in by_user.items():
+        if user_id is not None:
+            apply_spending_rollups(db, user_id, user_transactions)
+    return db_transactions
+
+
+def apply_spending_rollups(db: Session, user_id: int, transactions) -> None:
+    """
+    Add transactions to the user's spending rollups without committing.
+    """
+    increments = spending_rollup_increments(user_id, transactions)
+    if increments:
+        db.execute(spending_rollup_upsert_statement(db.get_bind().dialect.name, increments))
+
+
+def get_user_spending(db: Session, user_id: int, **filters) -> List[models.SpendingRollup]:
+    return db.scalars(user_spending_statement(user_id, **filters)).all()
+
+
+def get_user_transactions(
+    db: Session,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    **filters,
+) -> Tuple[List[models.Transaction], Optional[str]]:
+    """
+    Return one page of a user's transactions across all documents, newest
+    first, and the cursor of the next page. filters are the keyword
+    arguments of user_transactions_statement.
+    """
+    transactions = db.scalars(user_transactions_statement(user_id, cursor, limit, **filters)).all()
+    return paginate(transactions, limit, "date")
+
+
 def get_document_transactions(db: Session, document_id: int):
     return (
         db.query(models.Transaction)
@@ -124,6 +556,19 @@ def create_insight(db: Session, insight: schemas.InsightCreate):
     return db_insight
 
 
+def bulk_create_insights(db: Session, insights: List[schemas.InsightCreate]):
+    """
+    Insert many insights with one batched INSERT, without committing, like
+    bulk_create_transactions.
+    """
+    if not insights:
+        return []
+    return db.scalars(
+        insert(models.Insight).returning(models.Insight),
+        [insight.dict() for insight in insights],
+    ).all()
+
+
 def get_document_insights(db: Session, document_id: int):
     return (
         db.query(models.Insight)
@@ -145,6 +590,22 @@ def create_dispute(db: Session, dispute: schemas.DisputeCreate, document_id: int
     return db_dispute
 
 
+def get_dispute(db: Session, dispute_id: int):
+    return db.query(models.Dispute).filter(models.Dispute.id == dispute_id).first()
+
+
+def update_dispute_letter(
+    db: Session, dispute_id: int, letter_content: Optional[str], status: str
+):
+    db_dispute = get_dispute(db, dispute_id)
+    if db_dispute:
+        db_dispute.letter_content = letter_content
+        db_dispute.status = status
+        db.commit()
+        db.refresh(db_dispute)
+    return db_dispute
+
+
 def get_document_disputes(db: Session, document_id: int):
     return (
         db.query(models.Dispute)
@@ -1,22 +1,41 @@
-from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Form, BackgroundTasks
+from fastapi import FastAPI, Request, Depends, HTTPException, status, File, UploadFile, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 import os
-import uuid
-import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
-from app.database import get_db, engine
-from app import models, schemas, crud
+from app.database import get_async_db
+from app import async_crud, models, schemas
 from app.core.config import settings
-from app.core.security import create_access_token, get_password_hash, verify_password, get_current_user
-from app.worker import process_document_task
-
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+from app.core.metrics import render_metrics
+from app.core.middleware import BodySizeLimitMiddleware, MetricsMiddleware
+from app.core.pools import PoolSaturatedError
+from app.core.sse import SSE_HEADERS
+from app.core.security import (
+    create_access_token,
+    get_current_user,
+    hash_password_in_pool,
+    verify_password_in_pool,
+)
+from app.services.dispute_stream import dispute_event_stream
+from app.services.document_stream import document_event_stream
+from app.services.storage import (
+    ALLOWED_UPLOAD_EXTENSIONS,
+    InvalidBatchUploadError,
+    StoredFile,
+    UploadTooLargeError,
+    hash_upload_file,
+    remove_stored_files,
+    save_upload_file,
+    save_zip_members,
+    stored_filename_for,
+)
+from app.worker import enqueue_dispute_generation, enqueue_document_batch, enqueue_document_processing
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -34,6 +53,20 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# Reject oversized uploads before their body is read
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        f"{settings.API_V1_STR}/documents/upload": settings.MAX_UPLOAD_SIZE_BYTES
+        + settings.UPLOAD_FORM_OVERHEAD_BYTES,
+        f"{settings.API_V1_STR}/documents/upload/batch": settings.BATCH_UPLOAD_MAX_BYTES
+        + settings.UPLOAD_FORM_OVERHEAD_BYTES,
+    },
+)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -43,23 +76,44 @@ def read_root():
     return {"message": "Welcome to FinGenius API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus metrics. Served outside API_V1_STR so the public proxy,
+    which only forwards /api, does not expose it.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
 @app.post(f"{settings.API_V1_STR}/auth/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await async_crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    return crud.create_user(db=db, user=user)
+    hashed_password = await hash_password_in_pool(user.password)
+    return await async_crud.create_user(db, user=user, hashed_password=hashed_password)
 
 
 @app.post(f"{settings.API_V1_STR}/auth/login", response_model=schemas.Token)
-def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
 ):
-    user = crud.authenticate_user(db, form_data.username, form_data.password)
-    if not user:
+    user = await async_crud.get_user_by_email(db, email=form_data.username)
+    if not user or not await verify_password_in_pool(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -67,79 +121,277 @@ def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @app.get(f"{settings.API_V1_STR}/users/me", response_model=schemas.User)
-def read_users_me(current_user: models.User = Depends(get_current_user)):
+async def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 
+@app.patch(f"{settings.API_V1_STR}/users/me", response_model=schemas.User)
+async def update_user_me(
+    user_update: schemas.UserUpdate,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if user_update.email and user_update.email != current_user.email:
+        if await async_crud.get_user_by_email(db, email=user_update.email):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered",
+            )
+    hashed_password = None
+    if user_update.password:
+        hashed_password = await hash_password_in_pool(user_update.password)
+    return await async_crud.update_user(db, current_user.id, user_update, hashed_password)
+
+
 @app.post(f"{settings.API_V1_STR}/documents/upload")
 async def upload_document(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     document_type: str = Form(...),
     description: Optional[str] = Form(None),
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Validate file type
-    allowed_extensions = [".pdf", ".png", ".jpg", ".jpeg"]
     file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in allowed_extensions:
+    if file_ext not in ALLOWED_UPLOAD_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}",
+            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_UPLOAD_EXTENSIONS)}",
         )
 
+    try:
+        _, content_hash = await hash_upload_file(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
+
+    # An identical upload that was already processed is returned as is, before
+    # anything is stored
+    duplicate = await async_crud.get_document_by_content_hash(
+        db,
+        user_id=current_user.id,
+        content_hash=content_hash,
+        document_type=document_type,
+    )
+    if duplicate:
+        return {"id": duplicate.id, "status": "Document already processed, reused existing results"}
+
     # Create unique filename
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
+    unique_filename = stored_filename_for(file.filename)
     file_path = os.path.join(settings.DOCUMENT_STORAGE_PATH, unique_filename)
 
-    # Save file
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
+    # Stream file to disk
+    try:
+        _, content_hash = await save_upload_file(file, file_path)
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
 
     # Create document record in database
-    document = crud.create_document(
+    document = await async_crud.create_document(
         db=db,
         document=schemas.DocumentCreate(
             filename=file.filename,
             stored_filename=unique_filename,
             document_type=document_type,
             description=description,
+            content_hash=content_hash,
         ),
         user_id=current_user.id,
     )
 
-    # Process document in background
-    background_tasks.add_task(process_document_task, document.id)
+    # Queue document for processing by the Celery workers
+    await run_in_threadpool(enqueue_document_processing, document.id, lane="interactive")
 
     return {"id": document.id, "status": "Document uploaded and processing started"}
 
 
-@app.get(f"{settings.API_V1_STR}/documents", response_model=List[schemas.Document])
-def get_documents(
-    skip: int = 0,
-    limit: int = 100,
+@app.post(f"{settings.API_V1_STR}/documents/upload/batch", status_code=status.HTTP_202_ACCEPTED)
+async def upload_document_batch(
+    files: List[UploadFile] = File(...),
+    document_type: str = Form(...),
+    description: Optional[str] = Form(None),
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    documents = crud.get_user_documents(db, user_id=current_user.id, skip=skip, limit=limit)
-    return documents
+    """
+    Upload several documents of one type at once, as individual files and/or
+    ZIP archives. Files of other types, inside archives or not, are skipped
+    and listed in the response. Processing runs on the bulk lane; follow it
+    with GET /documents/batches/{batch_id}.
+    """
+    max_files = settings.BATCH_UPLOAD_MAX_FILES
+    stored: List[StoredFile] = []
+    skipped: List[str] = []
+    # Until the batch is recorded nothing refers to the stored files; remove them on any failure
+    try:
+        for file in files:
+            file_ext = os.path.splitext(file.filename)[1].lower()
+            if file_ext == ".zip":
+                members, skipped_members = await run_in_threadpool(
+                    save_zip_members,
+                    file.file,
+                    max_files - len(stored),
+                    max_total_size=(
+                        settings.BATCH_UPLOAD_MAX_BYTES
+                        - sum(stored_file.size for stored_file in stored)
+                    ),
+                )
+                stored.extend(members)
+                skipped.extend(f"{file.filename}/{name}" for name in skipped_members)
+            elif file_ext in ALLOWED_UPLOAD_EXTENSIONS:
+                if len(stored) >= max_files:
+                    raise InvalidBatchUploadError(f"Batch uploads are limited to {max_files} files")
+                unique_filename = stored_filename_for(file.filename)
+                size, content_hash = await save_upload_file(
+                    file, os.path.join(settings.DOCUMENT_STORAGE_PATH, unique_filename)
+                )
+                stored.append(StoredFile(file.filename, unique_filename, size, content_hash))
+                if sum(stored_file.size for stored_file in stored) > settings.BATCH_UPLOAD_MAX_BYTES:
+                    raise UploadTooLargeError(
+                        f"Batch uploads are limited to {settings.BATCH_UPLOAD_MAX_BYTES} bytes of documents"
+                    )
+            else:
+                skipped.append(file.filename)
+
+        if not stored:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No files to process. Allowed types: {', '.join(ALLOWED_UPLOAD_EXTENSIONS + ['.zip'])}",
+            )
+
+        batch, document_ids = await async_crud.create_document_batch(
+            db,
+            user_id=current_user.id,
+            document_type=document_type,
+            description=description,
+            files=stored,
+        )
+    except UploadTooLargeError as e:
+        remove_stored_files(stored)
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidBatchUploadError as e:
+        remove_stored_files(stored)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except BaseException:
+        remove_stored_files(stored)
+        raise
+
+    # Reuse the results of identical earlier uploads instead of processing them again
+    duplicates = await async_crud.get_documents_by_content_hashes(
+        db,
+        user_id=current_user.id,
+        content_hashes=[stored_file.content_hash for stored_file in stored],
+        document_type=document_type,
+    )
+    reused_ids = []
+    for document_id, stored_file in zip(document_ids, stored):
+        source = duplicates.get(stored_file.content_hash)
+        if source is not None:
+            await async_crud.copy_document_results(db, source=source, document_id=document_id)
+            reused_ids.append(document_id)
+
+    queued_ids = [document_id for document_id in document_ids if document_id not in reused_ids]
+    if queued_ids:
+        await run_in_threadpool(enqueue_document_batch, queued_ids, lane="bulk")
+
+    return {
+        "batch_id": batch.id,
+        "document_ids": document_ids,
+        "reused_document_ids": reused_ids,
+        "skipped": skipped,
+    }
+
+
+@app.get(
+    f"{settings.API_V1_STR}/documents/batches/{{batch_id}}",
+    response_model=schemas.UploadBatchProgress,
+)
+async def get_upload_batch(
+    batch_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    batch = await async_crud.get_upload_batch(db, batch_id=batch_id)
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found",
+        )
+    if batch.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this batch",
+        )
+
+    counts = await async_crud.get_batch_status_counts(db, batch_id=batch_id)
+    finished = counts.get("completed", 0) + counts.get("failed", 0)
+    return schemas.UploadBatchProgress(
+        id=batch.id,
+        document_type=batch.document_type,
+        created_at=batch.created_at,
+        total=batch.document_count,
+        pending=counts.get("pending", 0),
+        processing=counts.get("processing", 0),
+        completed=counts.get("completed", 0),
+        failed=counts.get("failed", 0),
+        is_finished=finished >= batch.document_count,
+    )
+
+
+@app.get(f"{settings.API_V1_STR}/documents/events")
+async def stream_document_events(
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Server-sent events for the current user's documents, in place of polling
+    GET /documents/{id}: "status" events ({document_id, status}) when a
+    document is queued, starts, completes or fails, and "stage" events
+    ({document_id, stage, seconds, completed_stages, total_stages}) as
+    processing stages finish. The stream opens with the status of every
+    document still pending or processing.
+    """
+    return StreamingResponse(
+        document_event_stream(current_user.id, is_disconnected=request.is_disconnected),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@app.get(f"{settings.API_V1_STR}/documents", response_model=schemas.DocumentPage)
+async def get_documents(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        documents, next_cursor = await async_crud.get_user_documents(
+            db, user_id=current_user.id, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"items": documents, "next_cursor": next_cursor}
 
 
 @app.get(f"{settings.API_V1_STR}/documents/{{document_id}}", response_model=schemas.DocumentDetail)
-def get_document(
+async def get_document(
     document_id: int,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    document = crud.get_document(db, document_id=document_id)
+    document = await async_crud.get_document_detail(db, document_id=document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -153,13 +405,106 @@ def get_document(
     return document
 
 
+@app.post(
+    f"{settings.API_V1_STR}/documents/{{document_id}}/reprocess",
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def reprocess_document(
+    document_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Queue a failed document again. Processing resumes after the last stage
+    that completed, without repeating its model calls or storing its
+    transactions twice.
+    """
+    document = await async_crud.get_document(db, document_id=document_id)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found",
+        )
+    if document.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this document",
+        )
+    if document.status != "failed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Only failed documents can be reprocessed; this one is {document.status}",
+        )
+
+    await async_crud.update_document_status(db, document_id=document_id, status="pending")
+    await run_in_threadpool(enqueue_document_processing, document_id, lane="interactive")
+
+    return {"id": document_id, "status": "Document queued for processing"}
+
+
+@app.get(f"{settings.API_V1_STR}/transactions", response_model=schemas.TransactionPage)
+async def get_transactions(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    document_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    category: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    is_flagged: Optional[bool] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        transactions, next_cursor = await async_crud.get_user_transactions(
+            db,
+            user_id=current_user.id,
+            cursor=cursor,
+            limit=limit,
+            document_id=document_id,
+            date_from=date_from,
+            date_to=date_to,
+            category=category,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            is_flagged=is_flagged,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"items": transactions, "next_cursor": next_cursor}
+
+
+@app.get(f"{settings.API_V1_STR}/analytics/spending", response_model=List[schemas.SpendingRollup])
+async def get_spending(
+    month_from: Optional[date] = None,
+    month_to: Optional[date] = None,
+    category: Optional[str] = None,
+    is_expense: Optional[bool] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Monthly totals per category across all of the user's documents, read
+    from the spending rollups rather than the transactions themselves.
+    """
+    return await async_crud.get_user_spending(
+        db,
+        user_id=current_user.id,
+        month_from=month_from,
+        month_to=month_to,
+        category=category,
+        is_expense=is_expense,
+    )
+
+
 @app.get(f"{settings.API_V1_STR}/insights/{{document_id}}", response_model=List[schemas.Insight])
-def get_document_insights(
+async def get_document_insights(
     document_id: int,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    document = crud.get_document(db, document_id=document_id)
+    document = await async_crud.get_document(db, document_id=document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -171,18 +516,27 @@ def get_document_insights(
             detail="Not authorized to access this document",
         )
     
-    insights = crud.get_document_insights(db, document_id=document_id)
+    insights = await async_crud.get_document_insights(db, document_id=document_id)
     return insights
 
 
-@app.post(f"{settings.API_V1_STR}/disputes/generate/{{document_id}}", response_model=schemas.Dispute)
-def generate_dispute(
+@app.post(
+    f"{settings.API_V1_STR}/disputes/generate/{{document_id}}",
+    response_model=schemas.Dispute,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def generate_dispute(
     document_id: int,
     dispute_data: schemas.DisputeCreate,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    document = crud.get_document(db, document_id=document_id)
+    """
+    Create a dispute and queue its letter for the worker. Follow progress
+    on GET /disputes/{id}/stream, or read the letter from GET /disputes/{id}
+    once its status is no longer "generating".
+    """
+    document = await async_crud.get_document(db, document_id=document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -193,25 +547,72 @@ def generate_dispute(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this document",
         )
-    
-    # Generate dispute letter using CrewAI
-    from app.services.dispute_generator import generate_dispute_letter
-    dispute_letter = generate_dispute_letter(document, dispute_data.reason, dispute_data.details)
-    
-    # Create dispute record
-    dispute = crud.create_dispute(
+
+    dispute = await async_crud.create_dispute(
         db=db,
-        dispute=schemas.DisputeCreate(
-            reason=dispute_data.reason,
-            details=dispute_data.details,
-            letter_content=dispute_letter,
-        ),
+        dispute=schemas.DisputeCreate(reason=dispute_data.reason, details=dispute_data.details),
         document_id=document_id,
+        status="generating",
     )
-    
+
+    # The letter is written by the Celery workers
+    await run_in_threadpool(enqueue_dispute_generation, dispute.id)
+
     return dispute
 
 
+async def _get_user_dispute(db: AsyncSession, dispute_id: int, user: models.User):
+    dispute = await async_crud.get_dispute(db, dispute_id=dispute_id)
+    if not dispute:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dispute not found",
+        )
+    document = await async_crud.get_document(db, document_id=dispute.document_id)
+    if document.user_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this dispute",
+        )
+    return dispute
+
+
+@app.get(f"{settings.API_V1_STR}/disputes/{{dispute_id}}", response_model=schemas.Dispute)
+async def get_dispute(
+    dispute_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await _get_user_dispute(db, dispute_id, current_user)
+
+
+@app.get(f"{settings.API_V1_STR}/disputes/{{dispute_id}}/stream")
+async def stream_dispute(
+    dispute_id: int,
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Server-sent events for a dispute letter: "token" events with each chunk
+    of text as the worker generates it, then "done" with the final letter or
+    "error". Reconnecting with Last-Event-ID resumes after that event.
+    """
+    await _get_user_dispute(db, dispute_id, current_user)
+    # Release the connection now rather than when the stream ends
+    await db.close()
+
+    return StreamingResponse(
+        dispute_event_stream(
+            dispute_id,
+            last_event_id=request.headers.get("last-event-id"),
+            is_disconnected=request.is_disconnected,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, DateTime, JSON, Float
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Index, Integer, String, Text, DateTime, JSON, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -29,14 +29,53 @@ class Document(Base):
     description = Column(Text, nullable=True)
     status = Column(String, default="pending")  # pending, processing, completed, failed
     extracted_data = Column(JSON, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the uploaded bytes
+    stage_timings = Column(JSON, nullable=True)  # seconds per pipeline stage
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     user_id = Column(Integer, ForeignKey("users.id"))
+    batch_id = Column(Integer, ForeignKey("upload_batches.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_documents_user_id_content_hash", "user_id", "content_hash", "document_type"),
+        Index("ix_documents_user_id_created_at", "user_id", "created_at"),
+        Index("ix_documents_batch_id_status", "batch_id", "status"),
+    )
 
     user = relationship("User", back_populates="documents")
+    batch = relationship("UploadBatch", back_populates="documents")
     insights = relationship("Insight", back_populates="document")
     disputes = relationship("Dispute", back_populates="document")
     transactions = relationship("Transaction", back_populates="document")
+    pipeline_checkpoints = relationship("PipelineCheckpoint", back_populates="document")
+
+
+class PipelineCheckpoint(Base):
+    __tablename__ = "pipeline_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    stage = Column(String, nullable=False)  # pipeline stage name, e.g. "text", "store_transactions"
+    output = Column(JSON, nullable=True)  # the stage's result; null for stages that only store
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("document_id", "stage", name="uq_pipeline_checkpoints_document_stage"),
+    )
+
+    document = relationship("Document", back_populates="pipeline_checkpoints")
+
+
+class UploadBatch(Base):
+    __tablename__ = "upload_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_type = Column(String)
+    document_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    user_id = Column(Integer, ForeignKey("users.id"))
+
+    documents = relationship("Document", back_populates="batch")
 
 
 class Transaction(Base):
@@ -53,6 +92,12 @@ class Transaction(Base):
     document_id = Column(Integer, ForeignKey("documents.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Both match the keyset order of the transaction listings: (date, id)
+        Index("ix_transactions_document_id_date_id", "document_id", "date", "id"),
+        Index("ix_transactions_date_id", "date", "id"),
+    )
+
     document = relationship("Document", back_populates="transactions")
 
 
@@ -77,9 +122,28 @@ class Dispute(Base):
     reason = Column(String)
     details = Column(Text)
     letter_content = Column(Text)
-    status = Column(String, default="draft")  # draft, sent, resolved
+    status = Column(String, default="draft")  # generating, draft, failed, sent, resolved
     document_id = Column(Integer, ForeignKey("documents.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     document = relationship("Document", back_populates="disputes")
+
+
+class SpendingRollup(Base):
+    __tablename__ = "spending_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(Date, nullable=False)  # first day of the month, UTC
+    category = Column(String, nullable=False)  # "uncategorized" when the transaction has none
+    is_expense = Column(Boolean, nullable=False)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "month", "category", "is_expense", name="uq_spending_rollups_key"
+        ),
+    )
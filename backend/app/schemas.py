@@ -1,10 +1,11 @@
 from typing import List, Optional, Dict, Any, Union
 from pydantic import BaseModel, EmailStr
-from datetime import datetime
+from datetime import date, datetime
 
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None
 
 
 class Token(BaseModel):
@@ -21,6 +22,12 @@ class UserCreate(UserBase):
     password: str
 
 
+class UserUpdate(BaseModel):
+    email: Optional[EmailStr] = None
+    full_name: Optional[str] = None
+    password: Optional[str] = None
+
+
 class User(UserBase):
     id: int
     is_active: bool
@@ -38,6 +45,7 @@ class DocumentBase(BaseModel):
 
 class DocumentCreate(DocumentBase):
     stored_filename: str
+    content_hash: Optional[str] = None
 
 
 class Document(DocumentBase):
@@ -50,6 +58,23 @@ class Document(DocumentBase):
         orm_mode = True
 
 
+class UploadBatchProgress(BaseModel):
+    id: int
+    document_type: str
+    created_at: datetime
+    total: int
+    pending: int = 0
+    processing: int = 0
+    completed: int = 0
+    failed: int = 0
+    is_finished: bool
+
+
+class DocumentPage(BaseModel):
+    items: List[Document]
+    next_cursor: Optional[str] = None
+
+
 class TransactionBase(BaseModel):
     date: datetime
     description: str
@@ -73,6 +98,22 @@ class Transaction(TransactionBase):
         orm_mode = True
 
 
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None
+
+
+class SpendingRollup(BaseModel):
+    month: date
+    category: str
+    is_expense: bool
+    total_amount: float
+    transaction_count: int
+
+    class Config:
+        orm_mode = True
+
+
 class InsightBase(BaseModel):
     insight_type: str
     title: str
@@ -104,7 +145,7 @@ class DisputeCreate(DisputeBase):
 
 class Dispute(DisputeBase):
     id: int
-    letter_content: str
+    letter_content: Optional[str] = None
     status: str
     document_id: int
     created_at: datetime
@@ -115,6 +156,7 @@ class Dispute(DisputeBase):
 
 class DocumentDetail(Document):
     extracted_data: Optional[Dict[str, Any]] = None
+    stage_timings: Optional[Dict[str, float]] = None
     transactions: List[Transaction] = []
     insights: List[Insight] = []
     disputes: List[Dispute] = []
@@ -0,0 +1,258 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+FEE_PATTERN = (
+    r"\b(?:fees?|interest|finance charge|overdraft|late (?:charge|payment)"
+    r"|penalty|nsf|returned item|service charge)\b"
+)
+
+ANOMALY_LABELS = {
+    "duplicate_charge": "Possible duplicate charges",
+    "amount_outlier": "Unusually large amounts for their category",
+    "fee": "Fees and interest",
+    "merchant_change": "Recurring charges that changed amount",
+}
+
+
+def _is_expense(value: Any) -> bool:
+    """
+    Read an is_expense value that may arrive as a string from the model;
+    anything unrecognized counts as an expense.
+    """
+    if isinstance(value, str):
+        return value.strip().lower() not in ("false", "no", "0")
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return True
+    return bool(value)
+
+
+def transactions_frame(transactions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Load extracted transactions into a frame with parsed dates and amounts,
+    a magnitude column and a normalized merchant key.
+    """
+    frame = pd.DataFrame(
+        transactions, columns=["date", "description", "amount", "category", "is_expense"]
+    )
+    frame["date"] = pd.to_datetime(frame["date"], errors="coerce", utc=True, format="ISO8601")
+    # A malformed amount from the model becomes NaN, never an infinite magnitude
+    frame["amount"] = pd.to_numeric(frame["amount"], errors="coerce").replace(
+        [np.inf, -np.inf], np.nan
+    )
+    frame["magnitude"] = frame["amount"].abs()
+    frame["description"] = frame["description"].fillna("").astype(str)
+    frame["category"] = frame["category"].fillna("uncategorized").replace("", "uncategorized")
+    frame["is_expense"] = frame["is_expense"].map(_is_expense).astype(bool)
+    # Card numbers, reference ids and punctuation vary between charges from one merchant
+    frame["merchant"] = (
+        frame["description"]
+        .str.lower()
+        .str.replace(r"\*\S*", " ", regex=True)
+        .str.replace(r"\S*\d\S*", " ", regex=True)
+        .str.replace(r"[^a-z]+", " ", regex=True)
+        .str.strip()
+    )
+    return frame
+
+
+def _findings(
+    frame: pd.DataFrame, mask: pd.Series, anomaly_type: str, reasons: pd.Series
+) -> List[Dict[str, Any]]:
+    flagged = frame[mask]
+    return [
+        {
+            "type": anomaly_type,
+            "index": int(index),
+            "date": row.date.strftime("%Y-%m-%d") if pd.notna(row.date) else None,
+            "description": row.description,
+            "amount": None if pd.isna(row.amount) else round(float(row.amount), 2),
+            "reason": reasons[index],
+        }
+        for index, row in zip(flagged.index, flagged.itertuples(index=False))
+    ]
+
+
+def _duplicate_charges(expenses: pd.DataFrame) -> List[Dict[str, Any]]:
+    candidates = expenses[
+        expenses["date"].notna()
+        & (expenses["merchant"] != "")
+        & np.isfinite(expenses["magnitude"])
+    ]
+    if candidates.empty:
+        return []
+    candidates = candidates.assign(cents=(candidates["magnitude"] * 100).round().astype(np.int64))
+    candidates = candidates.sort_values(["merchant", "cents", "date"])
+    groups = candidates.groupby(["merchant", "cents"], sort=False)["date"]
+    previous = groups.shift()
+    gap_days = (candidates["date"] - previous).dt.total_seconds() / 86400
+    mask = gap_days.le(settings.ANOMALY_DUPLICATE_WINDOW_DAYS)
+    reasons = (
+        "Possible duplicate of the "
+        + previous.dt.strftime("%Y-%m-%d").fillna("")
+        + " charge of "
+        + candidates["magnitude"].map("{:.2f}".format)
+    )
+    return _findings(candidates, mask, "duplicate_charge", reasons)
+
+
+def _amount_outliers(expenses: pd.DataFrame) -> List[Dict[str, Any]]:
+    groups = expenses.groupby("category", sort=False)["magnitude"]
+    median = groups.transform("median")
+    deviation = (expenses["magnitude"] - median).abs()
+    mad = deviation.groupby(expenses["category"], sort=False).transform("median")
+    size = groups.transform("size")
+    # Robust z-score: 0.6745 scales the MAD to a standard deviation for normal data
+    score = 0.6745 * (expenses["magnitude"] - median) / mad.replace(0, np.nan)
+    mask = (size >= settings.ANOMALY_OUTLIER_MIN_GROUP_SIZE) & score.gt(
+        settings.ANOMALY_OUTLIER_Z_SCORE
+    )
+    reasons = (
+        expenses["magnitude"].map("{:.2f}".format)
+        + " is unusually high for "
+        + expenses["category"].astype(str)
+        + " (typical "
+        + median.map("{:.2f}".format)
+        + ")"
+    )
+    return _findings(expenses, mask, "amount_outlier", reasons)
+
+
+def _fees(expenses: pd.DataFrame) -> List[Dict[str, Any]]:
+    mask = expenses["description"].str.contains(FEE_PATTERN, case=False, regex=True, na=False)
+    reasons = pd.Series("Fee or interest charge", index=expenses.index)
+    return _findings(expenses, mask, "fee", reasons)
+
+
+def _merchant_changes(expenses: pd.DataFrame) -> List[Dict[str, Any]]:
+    candidates = expenses[expenses["date"].notna() & (expenses["merchant"] != "")]
+    if candidates.empty:
+        return []
+    candidates = candidates.sort_values(["merchant", "date"])
+    groups = candidates.groupby("merchant", sort=False)["magnitude"]
+    previous = groups.shift(1)
+    before_previous = groups.shift(2)
+    # Only charges that were stable before count as a change
+    stable = (previous - before_previous).abs() <= 0.01 * previous
+    change_ratio = settings.ANOMALY_MERCHANT_CHANGE_RATIO
+    changed = (candidates["magnitude"] - previous).abs() > change_ratio * previous
+    reasons = (
+        "Recurring charge changed from "
+        + previous.map("{:.2f}".format, na_action="ignore").fillna("")
+        + " to "
+        + candidates["magnitude"].map("{:.2f}".format)
+    )
+    return _findings(candidates, stable & changed, "merchant_change", reasons)
+
+
+def detect_anomalies(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Find duplicate charges, per-category amount outliers, fee and interest
+    lines and recurring charges whose amount changed. Each finding refers to
+    a transaction by its index in transactions.
+    """
+    if not transactions:
+        return []
+    frame = transactions_frame(transactions)
+    expenses = frame[frame["is_expense"] & frame["magnitude"].notna()]
+    if expenses.empty:
+        return []
+    return (
+        _duplicate_charges(expenses)
+        + _amount_outliers(expenses)
+        + _fees(expenses)
+        + _merchant_changes(expenses)
+    )
+
+
+def apply_anomaly_flags(
+    transactions: List[Dict[str, Any]], findings: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Return copies of transactions with is_flagged and flag_reason set from
+    findings, keeping any reason the transaction already had.
+    """
+    reasons: Dict[int, List[str]] = {}
+    for finding in findings:
+        reasons.setdefault(finding["index"], []).append(finding["reason"])
+
+    flagged = []
+    for index, transaction in enumerate(transactions):
+        transaction = dict(transaction)
+        if index in reasons:
+            existing = [transaction["flag_reason"]] if transaction.get("flag_reason") else []
+            transaction["is_flagged"] = True
+            transaction["flag_reason"] = "; ".join(existing + reasons[index])
+        flagged.append(transaction)
+    return flagged
+
+
+def summarize_transactions(
+    transactions: List[Dict[str, Any]],
+    findings: Optional[List[Dict[str, Any]]] = None,
+    max_examples: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Summarize all transactions and the detector's findings compactly enough
+    to send to the insight model in place of the raw transactions.
+    """
+    if findings is None:
+        findings = detect_anomalies(transactions)
+    if max_examples is None:
+        max_examples = settings.ANOMALY_SUMMARY_MAX_EXAMPLES
+
+    frame = transactions_frame(transactions)
+    expenses = frame[frame["is_expense"]]
+    income = frame[~frame["is_expense"]]
+    dates = frame["date"].dropna()
+    summary: Dict[str, Any] = {
+        "transaction_count": len(frame),
+        "date_range": (
+            [dates.min().strftime("%Y-%m-%d"), dates.max().strftime("%Y-%m-%d")]
+            if not dates.empty
+            else None
+        ),
+        "total_expenses": round(float(expenses["magnitude"].sum()), 2),
+        "total_income": round(float(income["magnitude"].sum()), 2),
+        "expenses_by_category": {
+            category: round(float(total), 2)
+            for category, total in expenses.groupby("category")["magnitude"]
+            .sum()
+            .nlargest(10)
+            .items()
+        },
+        "top_merchants": [
+            {
+                "description": description,
+                "total": round(float(row["sum"]), 2),
+                "count": int(row["count"]),
+            }
+            for description, row in expenses.groupby("description")["magnitude"]
+            .agg(["sum", "count"])
+            .nlargest(max_examples, "sum")
+            .iterrows()
+        ],
+    }
+
+    anomalies: Dict[str, Any] = {}
+    for finding in findings:
+        group = anomalies.setdefault(
+            finding["type"],
+            {
+                "label": ANOMALY_LABELS.get(finding["type"], finding["type"]),
+                "count": 0,
+                "total_amount": 0.0,
+                "examples": [],
+            },
+        )
+        group["count"] += 1
+        group["total_amount"] = round(group["total_amount"] + abs(finding["amount"] or 0.0), 2)
+        if len(group["examples"]) < max_examples:
+            group["examples"].append(
+                {key: finding[key] for key in ("date", "description", "amount", "reason")}
+            )
+    summary["anomalies"] = anomalies
+    return summary
@@ -0,0 +1,102 @@
+import json
+from collections import Counter
+from typing import Any, Dict, List
+
+# Separator placed after every page of extracted text (Tesseract uses the same)
+PAGE_SEPARATOR = "\f"
+
+
+def split_text_into_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Split document text into chunks of at most max_chars characters.
+
+    Chunks are cut on page boundaries where possible, then on blank-line
+    sections, and only split lines apart when a single section is too long.
+    """
+    pieces: List[str] = []
+    for page in text.split(PAGE_SEPARATOR):
+        if len(page) <= max_chars:
+            pieces.append(page)
+            continue
+        for section in page.split("\n\n"):
+            if len(section) <= max_chars:
+                pieces.append(section + "\n\n")
+                continue
+            for line in section.splitlines(keepends=True):
+                while len(line) > max_chars:
+                    pieces.append(line[:max_chars])
+                    line = line[max_chars:]
+                pieces.append(line)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_size = 0
+    for piece in pieces:
+        if current and current_size + len(piece) > max_chars:
+            chunks.append("".join(current))
+            current, current_size = [], 0
+        current.append(piece)
+        current_size += len(piece)
+    if current:
+        chunks.append("".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _item_key(item: Any) -> str:
+    if isinstance(item, dict) and {"date", "amount"} <= item.keys():
+        # Transactions: ignore formatting differences between chunks
+        description = " ".join(str(item.get("description") or "").lower().split())
+        try:
+            amount = round(float(item["amount"]), 2)
+        except (TypeError, ValueError):
+            amount = item["amount"]
+        return json.dumps([str(item["date"]), description, amount])
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+def _merge_lists(lists: List[List[Any]]) -> List[Any]:
+    # An item is kept as many times as it appears in any single chunk, so
+    # repeated charges on one page survive while lines repeated across
+    # chunks (page headers, carried-over rows, notices) appear once.
+    allowed: Counter = Counter()
+    for items in lists:
+        for key, count in Counter(_item_key(item) for item in items).items():
+            allowed[key] = max(allowed[key], count)
+
+    merged = []
+    for items in lists:
+        for item in items:
+            key = _item_key(item)
+            if allowed[key] > 0:
+                allowed[key] -= 1
+                merged.append(item)
+    return merged
+
+
+def _merge_values(values: List[Any]) -> Any:
+    if all(isinstance(value, dict) for value in values):
+        merged: Dict[str, Any] = {}
+        for value in values:
+            for key in value:
+                if key not in merged:
+                    merged[key] = _merge_values([v[key] for v in values if key in v])
+        return merged
+    if all(isinstance(value, list) for value in values):
+        return _merge_lists(values)
+    for value in values:
+        if value not in (None, "", [], {}):
+            return value
+    return values[0] if values else None
+
+
+def merge_extracted_chunks(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge the JSON extracted from each chunk of a document into one result.
+
+    Nested objects are merged key by key, lists are concatenated with
+    duplicates across chunks removed, and scalars take the first non-empty
+    value in document order.
+    """
+    if not parts:
+        return {}
+    return _merge_values(parts)
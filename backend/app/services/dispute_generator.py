@@ -1,21 +1,16 @@
-from typing import Dict, Any
-import json
-from langchain_anthropic import ChatAnthropic
-from app.core.config import settings
+from typing import Dict, Any, Iterator
+from app.services.llm_client import invoke_llm, stream_llm
+from app.services.prompt_payload import build_prompt_payload
 from app import models
 
 
-def generate_dispute_letter(document: models.Document, reason: str, details: str) -> str:
+DISPUTE_MODEL = "claude-3-sonnet-20240229"
+
+
+def build_dispute_prompt(document: models.Document, reason: str, details: str) -> str:
     """
-    Generate a dispute letter using Anthropic Claude.
+    Build the dispute letter prompt for a document.
     """
-    # Initialize LLM
-    llm = ChatAnthropic(
-        model="claude-3-sonnet-20240229",
-        anthropic_api_key=settings.ANTHROPIC_API_KEY,
-        temperature=0.2,
-    )
-
     # Extract relevant data
     document_data = {
         "document_type": document.document_type,
@@ -23,7 +18,7 @@ def generate_dispute_letter(document: models.Document, reason: str, details: str
         "extracted_data": document.extracted_data if document.extracted_data else {},
     }
     
-    data_json = json.dumps(document_data, indent=2)
+    data_json = build_prompt_payload(document_data, "dispute")
 
     # Create the prompt
     prompt = f"""
@@ -58,34 +53,60 @@ def generate_dispute_letter(document: models.Document, reason: str, details: str
     Create a complete, ready-to-send letter that the user can print and mail or email.
     """
 
+    return prompt
+
+
+def extract_letter(content: str) -> str:
+    """
+    Strip the legal analysis that precedes the letter in a completion.
+    """
+    letter_text = content
+
+    # Try to find the start of the letter
+    letter_start_indicators = [
+        "---",
+        "===",
+        "DISPUTE LETTER",
+        "COMPLAINT LETTER",
+        "[Date]",
+        "[Your Name]",
+        "Dear ",
+    ]
+
+    # Try to find the start of the letter
+    for indicator in letter_start_indicators:
+        if indicator in content:
+            parts = content.split(indicator, 1)
+            if len(parts) > 1:
+                letter_text = indicator + parts[1]
+                break
+
+    return letter_text
+
+
+def generate_dispute_letter(document: models.Document, reason: str, details: str) -> str:
+    """
+    Generate a dispute letter using Anthropic Claude.
+    """
+    prompt = build_dispute_prompt(document, reason, details)
+
     # Call the LLM
     try:
-        response = llm.invoke(prompt)
+        content = invoke_llm(DISPUTE_MODEL, prompt, temperature=0.2)
         
         # Clean up the result to extract just the letter
-        letter_text = response.content
-        
-        # Try to find the start of the letter
-        letter_start_indicators = [
-            "---",
-            "===",
-            "DISPUTE LETTER",
-            "COMPLAINT LETTER",
-            "[Date]",
-            "[Your Name]",
-            "Dear ",
-        ]
-        
-        # Try to find the start of the letter
-        for indicator in letter_start_indicators:
-            if indicator in response.content:
-                parts = response.content.split(indicator, 1)
-                if len(parts) > 1:
-                    letter_text = indicator + parts[1]
-                    break
-        
-        return letter_text
+        return extract_letter(content)
         
     except Exception as e:
         print(f"Error calling Anthropic API: {e}")
         return f"Error generating dispute letter: {str(e)}"
+
+
+def stream_dispute_letter(document: models.Document, reason: str, details: str) -> Iterator[str]:
+    """
+    Yield the raw completion for a dispute letter as it is generated; pass
+    the joined text to extract_letter for the final letter. API errors are
+    raised to the caller.
+    """
+    prompt = build_dispute_prompt(document, reason, details)
+    return stream_llm(DISPUTE_MODEL, prompt, temperature=0.2)
@@ -0,0 +1,129 @@
+"""
+Relay of dispute letter tokens from the worker to SSE clients.
+
+The worker appends each chunk of the completion to a Redis stream per
+dispute; readers replay the stream from the start (or from the last event
+they saw), so a client that connects late still gets the whole letter.
+When Redis is unavailable readers fall back to polling the dispute row.
+"""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import redis
+
+from app import models
+from app.core.cache import get_async_redis, get_redis
+from app.core.config import settings
+from app.core.sse import format_sse, format_sse_comment
+from app.database import AsyncSessionLocal
+
+
+def stream_key(dispute_id: int) -> str:
+    return f"dispute:{dispute_id}:tokens"
+
+
+class DisputeStreamPublisher:
+    """
+    Append token, done and error events for one dispute. Redis errors are
+    logged once and further events dropped; the letter itself is always
+    stored on the dispute row.
+    """
+
+    def __init__(self, dispute_id: int) -> None:
+        self.key = stream_key(dispute_id)
+        self.enabled = True
+
+    def _publish(self, event_type: str, payload: dict) -> None:
+        if not self.enabled:
+            return
+        try:
+            client = get_redis()
+            pipe = client.pipeline(transaction=False)
+            pipe.xadd(self.key, {"type": event_type, "data": json.dumps(payload)})
+            pipe.expire(self.key, settings.DISPUTE_STREAM_TTL_SECONDS)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Dispute stream error, no longer publishing to {self.key}: {e}")
+            self.enabled = False
+
+    def start(self) -> None:
+        """
+        Drop events left by an earlier, interrupted attempt.
+        """
+        try:
+            get_redis().delete(self.key)
+        except redis.RedisError as e:
+            print(f"Dispute stream error, no longer publishing to {self.key}: {e}")
+            self.enabled = False
+
+    def token(self, text: str) -> None:
+        self._publish("token", {"text": text})
+
+    def done(self, letter_content: str) -> None:
+        self._publish("done", {"status": "draft", "letter_content": letter_content})
+
+    def error(self, message: str) -> None:
+        self._publish("error", {"status": "failed", "detail": message})
+
+
+async def _dispute_state(dispute_id: int) -> Optional[models.Dispute]:
+    # A short-lived session, so an open stream does not hold a pooled connection
+    async with AsyncSessionLocal() as db:
+        return await db.get(models.Dispute, dispute_id)
+
+
+def _final_event(dispute: Optional[models.Dispute]) -> str:
+    if dispute is None or dispute.status == "failed":
+        return format_sse("error", {"status": "failed", "detail": "Dispute letter generation failed"})
+    return format_sse("done", {"status": dispute.status, "letter_content": dispute.letter_content})
+
+
+async def dispute_event_stream(
+    dispute_id: int,
+    last_event_id: Optional[str] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield SSE messages for a dispute: a token event per chunk of the letter
+    as it is generated, then one done or error event.
+    """
+    deadline = time.monotonic() + settings.DISPUTE_STREAM_MAX_SECONDS
+    last_id = last_event_id or "0"
+    use_redis = True
+
+    while time.monotonic() < deadline:
+        if is_disconnected is not None and await is_disconnected():
+            return
+
+        entries = []
+        if use_redis:
+            try:
+                response = await get_async_redis().xread(
+                    {stream_key(dispute_id): last_id},
+                    block=settings.DISPUTE_STREAM_BLOCK_MS,
+                )
+                entries = response[0][1] if response else []
+            except (redis.RedisError, OSError) as e:
+                print(f"Dispute stream error, polling dispute {dispute_id} instead: {e}")
+                use_redis = False
+
+        for entry_id, fields in entries:
+            last_id = entry_id.decode()
+            event_type = fields[b"type"].decode()
+            yield format_sse(event_type, json.loads(fields[b"data"]), event_id=last_id)
+            if event_type in ("done", "error"):
+                return
+
+        if not entries:
+            # Also covers a worker that could not publish, and streams that expired
+            dispute = await _dispute_state(dispute_id)
+            if dispute is None or dispute.status != "generating":
+                yield _final_event(dispute)
+                return
+            yield format_sse_comment()
+            if not use_redis:
+                await asyncio.sleep(settings.DISPUTE_STREAM_BLOCK_MS / 1000)
+
+    yield format_sse("error", {"status": "generating", "detail": "Stream timed out"})
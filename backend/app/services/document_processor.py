@@ -1,11 +1,33 @@
 import os
 import json
-from typing import Dict, Any, Optional
-import pytesseract
-from PIL import Image
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
 import pypdf
-from langchain_anthropic import ChatAnthropic
 from app.core.config import settings
+from app.core.metrics import observe_text_extraction
+from app.core.pools import BoundedProcessPool, can_start_processes
+from app.services.chunking import PAGE_SEPARATOR, merge_extracted_chunks, split_text_into_chunks
+from app.services.llm_client import TransientLLMError, invoke_llm, is_json_completion
+from app.services.ocr import ocr_image
+
+# Shared with the statement line parser in app.services.statement_parser
+DATE_PATTERNS = [
+    r'\d{1,2}/\d{1,2}/\d{2,4}',  # MM/DD/YYYY or DD/MM/YYYY
+    r'\d{1,2}-\d{1,2}-\d{2,4}',  # MM-DD-YYYY or DD-MM-YYYY
+    r'[A-Z][a-z]{2,8} \d{1,2},? \d{4}'  # Month DD, YYYY
+]
+
+AMOUNT_PATTERNS = [
+    r'\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?',  # $X,XXX.XX
+    r'\d{1,3}(?:,\d{3})*(?:\.\d{2})? (?:dollars|USD)'  # X,XXX.XX dollars/USD
+]
+
+pdf_pool = BoundedProcessPool(
+    "pdf",
+    max_workers=settings.PDF_EXTRACT_WORKERS,
+    max_pending=settings.PDF_EXTRACT_WORKERS * 4,
+)
 
 
 def process_document(file_path: str, document_type: str) -> Optional[Dict[str, Any]]:
@@ -17,12 +39,18 @@ def process_document(file_path: str, document_type: str) -> Optional[Dict[str, A
     if not text:
         return None
 
-    # Initialize LLM
-    llm = ChatAnthropic(
-        model="claude-3-opus-20240229",
-        anthropic_api_key=settings.ANTHROPIC_API_KEY,
-        temperature=0.1,
-    )
+    return extract_document_data(text, document_type)
+
+
+def extract_document_data(text: str, document_type: str) -> Dict[str, Any]:
+    """
+    Extract structured data from the text of a document using Anthropic Claude.
+
+    Documents longer than EXTRACTION_CHUNK_CHARS are split into chunks that
+    are extracted concurrently and merged, instead of being truncated.
+    """
+    if len(text) > settings.EXTRACTION_CHUNK_CHARS:
+        return extract_document_data_chunked(text, document_type)
 
     # Prepare the prompt for document analysis
     prompt = f"""
@@ -31,7 +59,7 @@ def process_document(file_path: str, document_type: str) -> Optional[Dict[str, A
     Analyze this {document_type} document and extract all relevant information.
     
     Document text:
-    {text[:10000]}  # Limit text length to avoid token limits
+    {text}
     
     Focus on:
     1. Identifying the document type and issuer
@@ -60,15 +88,17 @@ def process_document(file_path: str, document_type: str) -> Optional[Dict[str, A
 
     # Call the LLM
     try:
-        response = llm.invoke(prompt)
+        content = invoke_llm(
+            "claude-3-opus-20240229", prompt, temperature=0.1, validate=is_json_completion
+        )
         
         # Parse the JSON result
         try:
             # Find JSON in the result
-            json_start = response.content.find('{')
-            json_end = response.content.rfind('}') + 1
+            json_start = content.find('{')
+            json_end = content.rfind('}') + 1
             if json_start >= 0 and json_end > json_start:
-                json_str = response.content[json_start:json_end]
+                json_str = content[json_start:json_end]
                 extracted_data = json.loads(json_str)
                 return extracted_data
             else:
@@ -87,6 +117,9 @@ def process_document(file_path: str, document_type: str) -> Optional[Dict[str, A
                 "extraction_status": "failed",
                 "extraction_method": "fallback"
             }
+    except TransientLLMError:
+        # Left to the task to retry rather than stored as a fallback result
+        raise
     except Exception as e:
         print(f"Error calling Anthropic API: {e}")
         return {
@@ -98,6 +131,70 @@ def process_document(file_path: str, document_type: str) -> Optional[Dict[str, A
         }
 
 
+def extract_document_data_chunked(text: str, document_type: str) -> Dict[str, Any]:
+    """
+    Map-reduce extraction for long documents: extract every chunk
+    concurrently, then merge the partial results.
+    """
+    chunks = split_text_into_chunks(text, settings.EXTRACTION_CHUNK_CHARS)
+
+    def extract_chunk(index: int) -> Optional[Dict[str, Any]]:
+        prompt = f"""
+    You are an expert in financial document analysis with years of experience in banking and financial services.
+    
+    Below is part {index + 1} of {len(chunks)} of a {document_type} document. Extract all relevant information that appears in this part.
+    
+    Document text (part {index + 1} of {len(chunks)}):
+    {chunks[index]}
+    
+    Return a JSON object with exactly these keys, leaving out nothing that appears in this part:
+    1. "document_metadata": type, issuer, dates, account info
+    2. "financial_summary": balances, totals, fees and interest
+    3. "transactions": a list of transactions, each with "date" (YYYY-MM-DD), "description" and "amount"
+    4. "notices": important notices or action items
+    
+    Use null or an empty list for anything not present in this part.
+    Return ONLY the JSON object without any additional text or explanation.
+    """
+        try:
+            content = invoke_llm(
+                "claude-3-opus-20240229", prompt, temperature=0.1, validate=is_json_completion
+            )
+        except TransientLLMError:
+            raise
+        except Exception as e:
+            print(f"Error calling Anthropic API for chunk {index + 1}/{len(chunks)}: {e}")
+            return None
+        json_start = content.find('{')
+        json_end = content.rfind('}') + 1
+        if json_start < 0 or json_end <= json_start:
+            return None
+        try:
+            return json.loads(content[json_start:json_end])
+        except json.JSONDecodeError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=settings.EXTRACTION_MAX_CONCURRENCY) as executor:
+        results = list(executor.map(extract_chunk, range(len(chunks))))
+
+    parts = [result for result in results if isinstance(result, dict)]
+    if not parts:
+        return {
+            "document_type": document_type,
+            "raw_text": text[:5000],  # Include truncated raw text
+            "extraction_status": "failed",
+            "extraction_method": "fallback"
+        }
+
+    extracted_data = merge_extracted_chunks(parts)
+    failed_chunks = [index + 1 for index, result in enumerate(results) if not isinstance(result, dict)]
+    if failed_chunks:
+        extracted_data["extraction_status"] = "partial"
+        extracted_data["failed_chunks"] = failed_chunks
+    extracted_data["chunk_count"] = len(chunks)
+    return extracted_data
+
+
 def extract_text_from_document(file_path: str) -> str:
     """
     Extract text from a document file (PDF, image, etc.)
@@ -116,15 +213,54 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     """
     Extract text from a PDF file
     """
-    text = ""
+    pages = []
+    started_at = time.perf_counter()
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = pypdf.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+        for page_text in iter_pdf_pages(pdf_path):
+            pages.append(page_text)
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
-    return text
+    observe_text_extraction("pdf", len(pages), time.perf_counter() - started_at)
+    return "".join(f"{page_text}\n{PAGE_SEPARATOR}" for page_text in pages)
+
+
+def iter_pdf_pages(pdf_path: str) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF file in order.
+
+    PDFs of at least two page ranges are extracted in parallel on the PDF
+    process pool, unless this process cannot start one; pages are yielded
+    as soon as their range is done, so callers can start on the first pages
+    while the rest are extracted.
+    """
+    with open(pdf_path, 'rb') as file:
+        page_count = len(pypdf.PdfReader(file).pages)
+
+    step = settings.PDF_PAGES_PER_TASK
+    if (
+        page_count < 2 * step
+        or settings.PDF_EXTRACT_WORKERS <= 1
+        or not can_start_processes()
+    ):
+        yield from _extract_pdf_page_range(pdf_path, 0, page_count)
+        return
+
+    futures = [
+        pdf_pool.submit(_extract_pdf_page_range, pdf_path, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _extract_pdf_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = pypdf.PdfReader(file)
+        return [pdf_reader.pages[index].extract_text() for index in range(start, stop)]
 
 
 def extract_text_from_image(image_path: str) -> str:
@@ -132,8 +268,10 @@ def extract_text_from_image(image_path: str) -> str:
     Extract text from an image file using OCR
     """
     try:
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image)
+        started_at = time.perf_counter()
+        with open(image_path, 'rb') as file:
+            text = ocr_image(file.read())
+        observe_text_extraction("image", 1, time.perf_counter() - started_at)
         return text
     except Exception as e:
         print(f"Error extracting text from image: {e}")
@@ -157,23 +295,12 @@ def extract_entities(text: str) -> Dict[str, Any]:
     import re
     
     # Find dates (simple patterns)
-    date_patterns = [
-        r'\d{1,2}/\d{1,2}/\d{2,4}',  # MM/DD/YYYY or DD/MM/YYYY
-        r'\d{1,2}-\d{1,2}-\d{2,4}',  # MM-DD-YYYY or DD-MM-YYYY
-        r'[A-Z][a-z]{2,8} \d{1,2},? \d{4}'  # Month DD, YYYY
-    ]
-    
-    for pattern in date_patterns:
+    for pattern in DATE_PATTERNS:
         matches = re.findall(pattern, text)
         entities["dates"].extend(matches)
     
     # Find monetary amounts
-    amount_patterns = [
-        r'\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?',  # $X,XXX.XX
-        r'\d{1,3}(?:,\d{3})*(?:\.\d{2})? (?:dollars|USD)'  # X,XXX.XX dollars/USD
-    ]
-    
-    for pattern in amount_patterns:
+    for pattern in AMOUNT_PATTERNS:
         matches = re.findall(pattern, text)
         entities["amounts"].extend(matches)
     
@@ -0,0 +1,68 @@
+"""
+Server-sent document events for one user, relayed from the Redis pub/sub
+channel the worker publishes to (see app.core.document_events).
+"""
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import redis
+
+from app import async_crud
+from app.core.cache import get_async_redis
+from app.core.config import settings
+from app.core.document_events import user_channel
+from app.core.sse import format_sse, format_sse_comment
+from app.database import AsyncSessionLocal
+
+
+async def document_event_stream(
+    user_id: int, is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+) -> AsyncIterator[str]:
+    """
+    Yield a "status" event for each of the user's pending or processing
+    documents, then "status" and "stage" events as the worker publishes
+    them, with keep-alive comments in between.
+    """
+    if not settings.DOCUMENT_EVENTS_ENABLED:
+        yield format_sse("error", {"detail": "Live document updates are disabled"})
+        return
+
+    pubsub = get_async_redis().pubsub()
+    try:
+        try:
+            await pubsub.subscribe(user_channel(user_id))
+        except (redis.RedisError, OSError) as e:
+            print(f"Document event stream error for user {user_id}: {e}")
+            yield format_sse("error", {"detail": "Live document updates are unavailable"})
+            return
+
+        # Subscribed first, so no change between the snapshot and the stream is lost
+        async with AsyncSessionLocal() as db:
+            in_progress = await async_crud.get_in_progress_documents(db, user_id=user_id)
+        for document_id, status in in_progress:
+            yield format_sse("status", {"type": "status", "document_id": document_id, "status": status})
+
+        deadline = time.monotonic() + settings.DOCUMENT_EVENTS_MAX_SECONDS
+        while time.monotonic() < deadline:
+            if is_disconnected is not None and await is_disconnected():
+                return
+            try:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=settings.DOCUMENT_EVENTS_HEARTBEAT_SECONDS,
+                )
+            except (redis.RedisError, OSError) as e:
+                print(f"Document event stream error for user {user_id}: {e}")
+                yield format_sse("error", {"detail": "Live document updates were interrupted"})
+                return
+            if message is None:
+                yield format_sse_comment()
+                continue
+            event = json.loads(message["data"])
+            yield format_sse(event["type"], event)
+    finally:
+        try:
+            await pubsub.aclose()
+        except (redis.RedisError, OSError):
+            pass
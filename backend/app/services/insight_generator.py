@@ -1,31 +1,30 @@
-from typing import Dict, Any, List
-from langchain_anthropic import ChatAnthropic
-from app.core.config import settings
+from typing import Dict, Any, List, Optional
+from app.services.anomaly_detector import summarize_transactions
+from app.services.llm_client import TransientLLMError, invoke_llm, is_json_completion
+from app.services.prompt_payload import build_prompt_payload
 import json
 
 
 def generate_insights(
     extracted_data: Dict[str, Any], 
     transactions: List[Dict[str, Any]], 
-    document_type: str
+    document_type: str,
+    anomalies: Optional[List[Dict[str, Any]]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Generate insights from extracted document data using Anthropic Claude.
-    """
-    # Initialize LLM
-    llm = ChatAnthropic(
-        model="claude-3-sonnet-20240229",
-        anthropic_api_key=settings.ANTHROPIC_API_KEY,
-        temperature=0.2,
-    )
 
+    All transactions are summarized locally, together with the anomalies
+    found by the detector (computed here when not passed in), so the model
+    sees aggregates and findings instead of raw transaction rows.
+    """
     # Prepare data for analysis
     data_for_analysis = {
         "document_type": document_type,
         "extracted_data": extracted_data,
-        "transactions": transactions[:50]  # Limit to avoid token limits
+        "transaction_summary": summarize_transactions(transactions, anomalies),
     }
-    data_json = json.dumps(data_for_analysis, indent=2)
+    data_json = build_prompt_payload(data_for_analysis, "insights")
 
     # Create the prompt
     prompt = f"""
@@ -36,6 +35,11 @@ def generate_insights(
     Financial data:
     {data_json}
     
+    The transaction_summary covers every transaction. Its "anomalies" were found by exact
+    checks (duplicate charges, category outliers, fees and interest, changed recurring
+    charges); treat them as confirmed and explain the ones that matter rather than
+    searching for them again.
+    
     Focus on:
     1. Spending patterns and categories
     2. Income vs. expenses
@@ -82,15 +86,20 @@ def generate_insights(
 
     # Call the LLM
     try:
-        response = llm.invoke(prompt)
+        content = invoke_llm(
+            "claude-3-sonnet-20240229",
+            prompt,
+            temperature=0.2,
+            validate=lambda content: is_json_completion(content, "["),
+        )
         
         # Parse the JSON result
         try:
             # Find JSON in the result
-            json_start = response.content.find('[')
-            json_end = response.content.rfind(']') + 1
+            json_start = content.find('[')
+            json_end = content.rfind(']') + 1
             if json_start >= 0 and json_end > json_start:
-                json_str = response.content[json_start:json_end]
+                json_str = content[json_start:json_end]
                 insights = json.loads(json_str)
                 return insights
             else:
@@ -109,6 +118,9 @@ def generate_insights(
                 "content": "The document has been processed. Please check the extracted data for details.",
                 "importance": 3
             }]
+    except TransientLLMError:
+        # Left to the task to retry rather than stored as a fallback result
+        raise
     except Exception as e:
         print(f"Error calling Anthropic API: {e}")
         return [{
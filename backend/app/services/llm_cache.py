@@ -0,0 +1,49 @@
+import hashlib
+from typing import Callable, Optional
+
+from langchain_anthropic import ChatAnthropic
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+
+llm_cache = TieredCache(
+    namespace="llm",
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    use_redis=settings.LLM_CACHE_REDIS_ENABLED,
+)
+
+
+def cache_key(model: str, temperature: Optional[float], prompt: str) -> str:
+    """
+    Build the cache key for a completion from everything that determines it.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{model}\0{temperature}\0".encode("utf-8"))
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def invoke_cached(
+    llm: ChatAnthropic, prompt: str, validate: Optional[Callable[[str], bool]] = None
+) -> str:
+    """
+    Return the completion text for prompt, calling the model only on a cache miss.
+
+    A fresh completion is cached only if validate (when given) accepts it,
+    so an answer the caller cannot parse is asked for again next time
+    instead of being replayed for the whole TTL.
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        return llm.invoke(prompt).content
+
+    key = cache_key(llm.model, llm.temperature, prompt)
+    content = llm_cache.get(key)
+    if content is not None:
+        return content
+
+    content = llm.invoke(prompt).content
+    if validate is None or validate(content):
+        llm_cache.set(key, content)
+    return content
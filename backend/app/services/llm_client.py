@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import anthropic
+import httpx
+from langchain_anthropic import ChatAnthropic
+
+from app.core.config import settings
+from app.core.metrics import LLMMetricsHandler
+from app.services.llm_cache import cache_key, invoke_cached, llm_cache
+
+_lock = threading.Lock()
+_clients: Dict[str, Tuple[anthropic.Anthropic, anthropic.AsyncAnthropic]] = {}
+_chat_models: Dict[Tuple[str, Optional[float]], ChatAnthropic] = {}
+
+
+class TransientLLMError(Exception):
+    """
+    Raised when a model call failed in a way that may succeed if retried
+    later: rate limits, overload, server errors, timeouts and dropped
+    connections. The Anthropic client has already retried by then.
+    """
+
+
+def is_transient_api_error(error: BaseException) -> bool:
+    if isinstance(error, anthropic.APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+@contextmanager
+def _transient_errors() -> Iterator[None]:
+    try:
+        yield
+    except Exception as e:
+        if is_transient_api_error(e):
+            raise TransientLLMError(f"{type(e).__name__}: {e}") from e
+        raise
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _get_clients(model: str) -> Tuple[anthropic.Anthropic, anthropic.AsyncAnthropic]:
+    clients = _clients.get(model)
+    if clients is None:
+        timeout = httpx.Timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS)
+        clients = (
+            anthropic.Anthropic(
+                api_key=settings.ANTHROPIC_API_KEY,
+                timeout=timeout,
+                http_client=httpx.Client(limits=_http_limits(), timeout=timeout),
+            ),
+            anthropic.AsyncAnthropic(
+                api_key=settings.ANTHROPIC_API_KEY,
+                timeout=timeout,
+                http_client=httpx.AsyncClient(limits=_http_limits(), timeout=timeout),
+            ),
+        )
+        _clients[model] = clients
+    return clients
+
+
+def get_llm(model: str, temperature: Optional[float] = None) -> ChatAnthropic:
+    """
+    Return the long-lived chat model for model and temperature.
+
+    All chat models for the same model name share one pair of sync/async
+    Anthropic clients, so HTTP keep-alive connections and TLS sessions are
+    reused across documents instead of being rebuilt on every call.
+    """
+    key = (model, temperature)
+    llm = _chat_models.get(key)
+    if llm is not None:
+        return llm
+
+    with _lock:
+        llm = _chat_models.get(key)
+        if llm is None:
+            llm = ChatAnthropic(
+                model=model,
+                anthropic_api_key=settings.ANTHROPIC_API_KEY,
+                temperature=temperature,
+                callbacks=[LLMMetricsHandler(model)],
+            )
+            client, async_client = _get_clients(model)
+            # ChatAnthropic builds default clients in its validator; swap in the pooled ones.
+            object.__setattr__(llm, "_client", client)
+            object.__setattr__(llm, "_async_client", async_client)
+            _chat_models[key] = llm
+    return llm
+
+
+def is_json_completion(content: str, opening: str = "{") -> bool:
+    """
+    Whether content holds a parseable JSON object (opening "{") or array
+    (opening "["), found the way the services extract it from a completion.
+    """
+    closing = "}" if opening == "{" else "]"
+    json_start = content.find(opening)
+    json_end = content.rfind(closing) + 1
+    if json_start < 0 or json_end <= json_start:
+        return False
+    try:
+        json.loads(content[json_start:json_end])
+    except json.JSONDecodeError:
+        return False
+    return True
+
+
+def invoke_llm(
+    model: str,
+    prompt: str,
+    temperature: Optional[float] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """
+    Run prompt against model and return the completion text. Transient API
+    errors are raised as TransientLLMError. The completion is only cached
+    if validate, when given, accepts it.
+    """
+    with _transient_errors():
+        return invoke_cached(get_llm(model, temperature), prompt, validate=validate)
+
+
+async def ainvoke_llm(
+    model: str,
+    prompt: str,
+    temperature: Optional[float] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """
+    Async variant of invoke_llm that does not block the event loop.
+    """
+    llm = get_llm(model, temperature)
+    if not settings.LLM_CACHE_ENABLED:
+        with _transient_errors():
+            return (await llm.ainvoke(prompt)).content
+
+    key = cache_key(model, temperature, prompt)
+    content = await asyncio.to_thread(llm_cache.get, key)
+    if content is not None:
+        return content
+
+    with _transient_errors():
+        content = (await llm.ainvoke(prompt)).content
+    if validate is None or validate(content):
+        await asyncio.to_thread(llm_cache.set, key, content)
+    return content
+
+
+def stream_llm(model: str, prompt: str, temperature: Optional[float] = None) -> Iterator[str]:
+    """
+    Yield the completion text for prompt as it is generated. A cached
+    completion is yielded in one piece; a fresh one is cached once complete.
+    """
+    llm = get_llm(model, temperature)
+    key = cache_key(model, temperature, prompt)
+    if settings.LLM_CACHE_ENABLED:
+        content = llm_cache.get(key)
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    with _transient_errors():
+        for chunk in llm.stream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+    if settings.LLM_CACHE_ENABLED:
+        llm_cache.set(key, "".join(parts))
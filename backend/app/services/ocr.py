@@ -0,0 +1,74 @@
+import hashlib
+import io
+import time
+from typing import Tuple
+
+import pytesseract
+from PIL import Image, ImageOps
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.core.metrics import OCR_TESSERACT_SECONDS
+from app.core.pools import BoundedThreadPool
+
+# Tesseract runs as a subprocess, so threads are enough to use every core, and
+# unlike worker processes they can be started from a Celery prefork child
+ocr_pool = BoundedThreadPool(
+    "ocr",
+    max_workers=settings.OCR_WORKERS,
+    max_pending=settings.OCR_MAX_PENDING,
+)
+
+ocr_cache = TieredCache(
+    namespace="ocr",
+    ttl_seconds=settings.OCR_CACHE_TTL_SECONDS,
+    max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+    max_bytes=settings.OCR_CACHE_MAX_BYTES,
+    use_redis=settings.OCR_CACHE_REDIS_ENABLED,
+)
+
+
+def normalize_image(image: Image.Image) -> Image.Image:
+    """
+    Prepare an image for OCR: apply the EXIF orientation, convert to
+    grayscale and downscale anything larger than a page at OCR_TARGET_DPI.
+    """
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L")
+
+    max_side = int(settings.OCR_TARGET_DPI * settings.OCR_PAGE_LONG_SIDE_INCHES)
+    scale = max_side / max(image.size)
+    if scale < 1:
+        image = image.resize(
+            (max(int(image.width * scale), 1), max(int(image.height * scale), 1)),
+            Image.LANCZOS,
+        )
+    return image
+
+
+def _ocr_image_bytes(data: bytes) -> Tuple[str, float]:
+    """
+    Normalize and OCR an encoded image; runs on the OCR pool.
+    """
+    image = normalize_image(Image.open(io.BytesIO(data)))
+    started_at = time.perf_counter()
+    text = pytesseract.image_to_string(image, config=f"--dpi {settings.OCR_TARGET_DPI}")
+    return text, time.perf_counter() - started_at
+
+
+def ocr_image(data: bytes) -> str:
+    """
+    Return the OCR text of an encoded image, reusing the result for
+    identical image bytes.
+    """
+    key = f"{hashlib.sha256(data).hexdigest()}:{settings.OCR_TARGET_DPI}"
+    text = ocr_cache.get(key)
+    if text is not None:
+        return text
+
+    future = ocr_pool.submit(_ocr_image_bytes, data, timeout=settings.OCR_QUEUE_TIMEOUT_SECONDS)
+    text, seconds = future.result()
+    OCR_TESSERACT_SECONDS.observe(seconds)
+
+    ocr_cache.set(key, text)
+    return text
@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class StageFailedError(Exception):
+    """
+    Raised by a stage to stop the pipeline with a user-facing message.
+    """
+
+
+class StageTimeoutError(Exception):
+    """
+    Raised when a stage runs longer than its timeout.
+    """
+
+
+@dataclass
+class Stage:
+    """
+    A named unit of work in a pipeline.
+
+    func receives a dict with the results of every completed stage, keyed by
+    stage name, and returns this stage's result.
+    """
+
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends_on: Sequence[str] = field(default_factory=tuple)
+    timeout: Optional[float] = None
+
+
+class Pipeline:
+    """
+    Run stages as a dependency graph, starting each one as soon as its
+    dependencies have finished so that independent stages overlap.
+    """
+
+    def __init__(self, stages: List[Stage], max_workers: int = 4) -> None:
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        self._validate()
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+
+        # Reject cycles up front instead of deadlocking at run time
+        resolved: set = set()
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [name for name, stage in remaining.items() if set(stage.depends_on) <= resolved]
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle among: {', '.join(sorted(remaining))}")
+            for name in ready:
+                resolved.add(name)
+                del remaining[name]
+
+    def run(
+        self,
+        results: Optional[Dict[str, Any]] = None,
+        timings: Optional[Dict[str, float]] = None,
+        on_stage_complete: Optional[Callable[[str, float], None]] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run every stage and return the results keyed by stage name.
+
+        Stages already present in results are treated as completed. Wall-clock
+        seconds per stage are written into timings as stages finish, so the
+        caller still has them when a stage fails. on_stage_complete, if
+        given, is called with the name and seconds of each stage that
+        completes, from the thread that called run.
+
+        Stages still running when a stage fails or times out are abandoned,
+        not interrupted. cancelled, if given, is set at that point; stage
+        functions that write anything should check it first.
+        """
+        results = dict(results or {})
+        timings = timings if timings is not None else {}
+        pending = {name: stage for name, stage in self.stages.items() if name not in results}
+        running: Dict[Future, tuple] = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline")
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dependency in results for dependency in stage.depends_on):
+                        started_at = time.monotonic()
+                        future = executor.submit(stage.func, dict(results))
+                        running[future] = (stage, started_at)
+                        del pending[name]
+
+                now = time.monotonic()
+                deadlines = [
+                    started_at + stage.timeout - now
+                    for stage, started_at in running.values()
+                    if stage.timeout is not None
+                ]
+                done, _ = wait(
+                    running,
+                    timeout=max(min(deadlines), 0) if deadlines else None,
+                    return_when=FIRST_COMPLETED,
+                )
+
+                for future in done:
+                    stage, started_at = running.pop(future)
+                    timings[stage.name] = round(time.monotonic() - started_at, 3)
+                    results[stage.name] = future.result()
+                    if on_stage_complete is not None:
+                        on_stage_complete(stage.name, timings[stage.name])
+
+                now = time.monotonic()
+                for stage, started_at in running.values():
+                    if stage.timeout is not None and now - started_at >= stage.timeout:
+                        timings[stage.name] = round(now - started_at, 3)
+                        raise StageTimeoutError(
+                            f"Stage '{stage.name}' timed out after {stage.timeout} seconds"
+                        )
+        except BaseException:
+            if cancelled is not None:
+                cancelled.set()
+            raise
+        finally:
+            # Threads cannot be interrupted; abandon stragglers rather than wait on them
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
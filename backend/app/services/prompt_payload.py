@@ -0,0 +1,150 @@
+import copy
+import json
+import math
+import re
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.metrics import PROMPT_PAYLOAD_TOKENS, PROMPT_PAYLOADS_TRIMMED
+
+# Rough characters per token for JSON-heavy English text
+CHARS_PER_TOKEN = 4
+
+# Fields each stage never needs; pruned at any depth of the payload
+EXTRACTION_METADATA = {
+    "extraction_status", "extraction_method", "error", "chunk_count", "failed_chunks",
+}
+STAGE_PRUNED_FIELDS = {
+    # raw_text only exists when extraction fell back, and is then the only source
+    "transactions": EXTRACTION_METADATA,
+    # transaction_summary already covers every transaction
+    "insights": EXTRACTION_METADATA | {"raw_text", "transactions"},
+    "dispute": EXTRACTION_METADATA | {"raw_text"},
+}
+
+TRUNCATION_MARKER = "...[truncated]"
+OMITTED_ITEMS_RE = re.compile(r"^\.\.\.(\d+) more items omitted$")
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def stage_token_budget(stage: str) -> Optional[int]:
+    return {
+        "transactions": settings.PROMPT_BUDGET_TRANSACTIONS_TOKENS,
+        "insights": settings.PROMPT_BUDGET_INSIGHTS_TOKENS,
+        "dispute": settings.PROMPT_BUDGET_DISPUTE_TOKENS,
+    }.get(stage)
+
+
+def _compact(value: Any, pruned_fields: set) -> Any:
+    """
+    Copy value without pruned fields and without empty values.
+    """
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key in pruned_fields:
+                continue
+            item = _compact(item, pruned_fields)
+            if item is None or item == "" or item == [] or item == {}:
+                continue
+            result[key] = item
+        return result
+    if isinstance(value, list):
+        return [_compact(item, pruned_fields) for item in value]
+    return value
+
+
+def _serialize(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _list_items(value: list) -> list:
+    """
+    Return the items of a list without the omitted-items note _trim adds.
+    """
+    if value and isinstance(value[-1], str) and OMITTED_ITEMS_RE.match(value[-1]):
+        return value[:-1]
+    return value
+
+
+def _largest_trimmable(value: Any, parent: Any = None, key: Any = None, best=None):
+    """
+    Find the largest list with more than one item, or string longer than
+    a few markers, returning (size, parent, key).
+    """
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        items = ()
+
+    if parent is not None and (
+        (isinstance(value, list) and len(_list_items(value)) > 1)
+        or (isinstance(value, str) and len(value) > 4 * len(TRUNCATION_MARKER))
+    ):
+        size = len(_serialize(value))
+        if best is None or size > best[0]:
+            best = (size, parent, key)
+
+    for child_key, child in items:
+        best = _largest_trimmable(child, value, child_key, best)
+    return best
+
+
+def _trim(value: Any, max_chars: int) -> Any:
+    """
+    Halve the largest list or string until the serialized value fits.
+    Lists keep their first items and end with a note of how many were
+    dropped, so the model knows the data is partial.
+    """
+    value = {"payload": value}
+    while len(_serialize(value)) > max_chars:
+        found = _largest_trimmable(value)
+        if found is None:
+            break
+        _, parent, key = found
+        target = parent[key]
+        if isinstance(target, str):
+            keep = len(target) // 2
+            parent[key] = target[:keep] + TRUNCATION_MARKER
+        else:
+            items = _list_items(target)
+            dropped = int(OMITTED_ITEMS_RE.match(target[-1]).group(1)) if items is not target else 0
+            keep = max(len(items) // 2, 1)
+            dropped += len(items) - keep
+            parent[key] = items[:keep] + [f"...{dropped} more items omitted"]
+    return value["payload"]
+
+
+def build_prompt_payload(data: Any, stage: str, budget_tokens: Optional[int] = None) -> str:
+    """
+    Serialize data for the prompt of an LLM stage: compact JSON without the
+    fields the stage does not need, trimmed to the stage's token budget.
+    Before and after sizes are recorded per stage.
+    """
+    if budget_tokens is None:
+        budget_tokens = stage_token_budget(stage)
+
+    original = json.dumps(data, indent=2, default=str)
+    payload = _compact(copy.deepcopy(data), STAGE_PRUNED_FIELDS.get(stage, set()))
+    text = _serialize(payload)
+    trimmed = False
+    if budget_tokens and estimate_tokens(text) > budget_tokens:
+        max_chars = budget_tokens * CHARS_PER_TOKEN
+        text = _serialize(_trim(payload, max_chars))
+        if len(text) > max_chars:
+            text = text[: max_chars - len(TRUNCATION_MARKER)] + TRUNCATION_MARKER
+        trimmed = True
+
+    _record_payload(stage, estimate_tokens(original), estimate_tokens(text), trimmed)
+    return text
+
+
+def _record_payload(stage: str, tokens_before: int, tokens_after: int, trimmed: bool) -> None:
+    PROMPT_PAYLOAD_TOKENS.labels(stage, "before").inc(tokens_before)
+    PROMPT_PAYLOAD_TOKENS.labels(stage, "after").inc(tokens_after)
+    if trimmed:
+        PROMPT_PAYLOADS_TRIMMED.labels(stage).inc()
@@ -0,0 +1,114 @@
+"""
+Rebuild spending rollups from the transactions table.
+
+The worker keeps rollups current incrementally (crud.apply_spending_rollups);
+this is for backfills and repairs:
+
+    python -m app.services.spending_rollups [--user-id ID]
+"""
+import argparse
+import time
+from typing import List, Optional
+
+import pandas as pd
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app import crud, models
+
+ROLLUP_KEY = ["user_id", "month", "category", "is_expense"]
+
+
+def compute_spending_rollups(transactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate a frame with user_id, date, amount, category and is_expense
+    columns into rollup rows, bucketing months the same way as
+    crud.spending_month.
+    """
+    frame = transactions.dropna(subset=["user_id", "date", "amount"])
+    dates = pd.to_datetime(frame["date"], utc=True).dt.tz_convert(None)
+    frame = frame.assign(
+        month=dates.dt.to_period("M").dt.start_time.dt.date,
+        category=frame["category"].replace("", None).fillna(crud.UNCATEGORIZED),
+        is_expense=frame["is_expense"].fillna(False).astype(bool),
+    )
+    return (
+        frame.groupby(ROLLUP_KEY, sort=False)
+        .agg(total_amount=("amount", "sum"), transaction_count=("amount", "size"))
+        .reset_index()
+    )
+
+
+def rebuild_spending_rollups(
+    db: Session, user_id: Optional[int] = None, chunk_size: int = 100_000
+) -> int:
+    """
+    Replace the rollups of one user, or of every user, with totals computed
+    from their transactions. Returns the number of rollup rows written.
+    """
+    statement = select(
+        models.Document.user_id,
+        models.Transaction.date,
+        models.Transaction.amount,
+        models.Transaction.category,
+        models.Transaction.is_expense,
+    ).join(models.Document, models.Transaction.document_id == models.Document.id)
+    if user_id is not None:
+        statement = statement.where(models.Document.user_id == user_id)
+
+    partials: List[pd.DataFrame] = [
+        compute_spending_rollups(chunk)
+        for chunk in pd.read_sql(statement, db.connection(), chunksize=chunk_size)
+    ]
+    partials = [partial for partial in partials if not partial.empty]
+    if partials:
+        rollups = (
+            pd.concat(partials, ignore_index=True)
+            .groupby(ROLLUP_KEY, sort=False)
+            .sum()
+            .reset_index()
+        )
+    else:
+        rollups = pd.DataFrame(columns=ROLLUP_KEY + ["total_amount", "transaction_count"])
+
+    clear = delete(models.SpendingRollup)
+    if user_id is not None:
+        clear = clear.where(models.SpendingRollup.user_id == user_id)
+    db.execute(clear)
+
+    rows = [
+        {
+            "user_id": int(row.user_id),
+            "month": row.month,
+            "category": row.category,
+            "is_expense": bool(row.is_expense),
+            "total_amount": float(row.total_amount),
+            "transaction_count": int(row.transaction_count),
+        }
+        for row in rollups.itertuples(index=False)
+    ]
+    if rows:
+        db.execute(insert(models.SpendingRollup), rows)
+    db.commit()
+    return len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="transactions read per batch")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        started_at = time.perf_counter()
+        count = rebuild_spending_rollups(db, user_id=args.user_id, chunk_size=args.chunk_size)
+        print(f"Rebuilt {count} spending rollups in {time.perf_counter() - started_at:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.document_processor import DATE_PATTERNS
+
+MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [
+            ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+            ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+            ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+            ("dec", "december"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+
+MONTH_NAME = "(?:" + "|".join(sorted(MONTHS, key=len, reverse=True)) + ")"
+
+FULL_DATE_PATTERNS = (
+    [r"\d{4}-\d{2}-\d{2}"]
+    + DATE_PATTERNS
+    + [rf"\d{{1,2}} {MONTH_NAME},? \d{{4}}"]  # DD Month YYYY
+)
+
+# Full dates first so the alternation never stops at a shorter prefix
+DATE_TOKEN = "|".join(
+    FULL_DATE_PATTERNS
+    + [
+        r"\d{1,2}/\d{1,2}",  # MM/DD, year taken from the statement period
+        rf"{MONTH_NAME} \d{{1,2}}",  # Month DD
+        rf"\d{{1,2}} {MONTH_NAME}",  # DD Month
+    ]
+)
+
+# Statement amounts always carry cents, which keeps reference numbers out
+AMOUNT_TOKEN = (
+    r"\(\$?\d{1,3}(?:,\d{3})*\.\d{2}\)"
+    r"|[-+]?\$?\d{1,3}(?:,\d{3})*\.\d{2}(?:\s?(?:CR|DR)|-)?"
+    r"|[-+]?\$?\d+\.\d{2}(?:\s?(?:CR|DR)|-)?"
+)
+
+FULL_DATE_RE = re.compile("|".join(FULL_DATE_PATTERNS), re.IGNORECASE)
+DATE_LINE_RE = re.compile(rf"^\s*(?:{DATE_TOKEN})(?=\s)", re.IGNORECASE)
+TRANSACTION_LINE_RE = re.compile(
+    rf"^\s*(?P<date>{DATE_TOKEN})(?:\s+(?P<posted>{DATE_TOKEN}))?"
+    rf"\s+(?P<description>.*?[A-Za-z].*?)"
+    rf"\s+(?P<amount>{AMOUNT_TOKEN})(?:\s+(?P<balance>{AMOUNT_TOKEN}))?\s*$",
+    re.IGNORECASE,
+)
+BALANCE_LINE_RE = re.compile(
+    r"\b(?:opening|closing|previous|new|beginning|ending|starting) balance\b"
+    r"|\bbalance (?:brought |carried )?forward\b",
+    re.IGNORECASE,
+)
+INCOME_RE = re.compile(
+    r"\b(?:deposit|salary|payroll|direct dep|refund|interest paid|dividend"
+    r"|transfer from|payment received|payment - thank you|payment thank you)\b",
+    re.IGNORECASE,
+)
+
+# Whether an amount marker means money out; unmarked amounts are decided by
+# the running balance, then by INCOME_RE. On card statements a minus or CR
+# marks payments and refunds.
+BANK_MARKERS = {"minus": True, "dr": True, "plus": False, "cr": False}
+CARD_MARKERS = {"minus": False, "cr": False, "dr": True}
+
+CATEGORY_KEYWORDS = [
+    ("Fees", r"\b(?:fee|interest charge|finance charge|overdraft|penalty)\b"),
+    ("Income", r"\b(?:salary|payroll|direct dep|dividend|interest paid)\b"),
+    ("Transfer", r"\b(?:transfer|zelle|venmo|paypal)\b"),
+    (
+        "Groceries",
+        r"\b(?:grocery|supermarket|tesco|safeway|kroger|aldi|lidl|whole foods|trader joe)\b",
+    ),
+    (
+        "Dining",
+        r"\b(?:restaurant|cafe|coffee|starbucks|mcdonald|pizza|grill|doordash|uber eats)\b",
+    ),
+    (
+        "Transportation",
+        r"\b(?:uber|lyft|taxi|shell|chevron|exxon|fuel|gas station|parking|transit)\b",
+    ),
+    ("Utilities", r"\b(?:electric|water|utility|energy|comcast|verizon|internet)\b"),
+    ("Entertainment", r"\b(?:netflix|spotify|hulu|disney|cinema|theater)\b"),
+    ("Shopping", r"\b(?:amazon|amzn|walmart|target|ebay|best buy|ikea)\b"),
+]
+CATEGORY_RES = [
+    (category, re.compile(pattern, re.IGNORECASE)) for category, pattern in CATEGORY_KEYWORDS
+]
+
+# Share of the confidence kept when no running balance is available to verify rows
+UNVERIFIED_CONFIDENCE = 0.9
+
+
+@dataclass
+class ParsedStatement:
+    """
+    Transactions read from statement lines, and how far to trust them.
+
+    confidence is the share of date-led lines that parsed, scaled by how
+    many rows agree with the running balance (or by UNVERIFIED_CONFIDENCE
+    when the statement prints no balances).
+    """
+
+    transactions: List[Dict[str, Any]] = field(default_factory=list)
+    confidence: float = 0.0
+    candidate_lines: int = 0
+    balance_checks: int = 0
+    balance_matches: int = 0
+
+
+def _parse_amount(token: str) -> Tuple[float, Optional[str]]:
+    """
+    Return the magnitude of an amount token and its marker: "minus" for a
+    leading or trailing minus or parentheses, "plus", "dr", "cr" or None.
+    """
+    token = token.strip()
+    upper = token.upper()
+    marker = None
+    if upper.endswith("DR"):
+        marker = "dr"
+    elif upper.endswith("CR"):
+        marker = "cr"
+    elif token.startswith(("(", "-")) or token.endswith("-"):
+        marker = "minus"
+    elif token.startswith("+"):
+        marker = "plus"
+    return float(re.sub(r"[^\d.]", "", upper.replace("CR", "").replace("DR", ""))), marker
+
+
+def _parse_date(
+    token: str, day_first: bool, period: Optional[Tuple[date, date]]
+) -> Optional[date]:
+    """
+    Parse a date token; tokens without a year take it from the statement
+    period, or are rejected when there is none.
+    """
+    token = token.strip().replace(",", "")
+    try:
+        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", token):
+            return date.fromisoformat(token)
+
+        numeric = re.fullmatch(r"(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?", token)
+        if numeric:
+            first, second, year = numeric.groups()
+            day, month = (int(first), int(second)) if day_first else (int(second), int(first))
+            if year is None:
+                if period is None:
+                    return None
+                year = _period_year(month, period)
+            year = int(year)
+            if year < 100:
+                year += 2000
+            return date(year, month, day)
+
+        words = token.split()
+        if words[0].isdigit():
+            day, month_name, year = int(words[0]), words[1], words[2] if len(words) > 2 else None
+        else:
+            month_name, day, year = words[0], int(words[1]), words[2] if len(words) > 2 else None
+        month = MONTHS.get(month_name.lower())
+        if month is None:
+            return None
+        if year is None:
+            if period is None:
+                return None
+            year = _period_year(month, period)
+        return date(int(year), month, day)
+    except (ValueError, IndexError):
+        return None
+
+
+def _statement_period(text: str, day_first: bool) -> Optional[Tuple[date, date]]:
+    """
+    Take the statement period from the full dates in the text: from the
+    earliest one within a year of the latest, so that an old date elsewhere
+    on the statement does not stretch it.
+    """
+    dates = [
+        parsed
+        for parsed in (_parse_date(token, day_first, None) for token in FULL_DATE_RE.findall(text))
+        if parsed is not None
+    ]
+    if not dates:
+        return None
+    end = max(dates)
+    return min(parsed for parsed in dates if (end - parsed).days <= 366), end
+
+
+def _period_year(month: int, period: Tuple[date, date]) -> int:
+    """
+    Pick the year of a month in the statement period: a period across New
+    Year puts months before its first month in the later year.
+    """
+    start, end = period
+    if end.year > start.year and month < start.month:
+        return end.year
+    return start.year
+
+
+def _is_day_first(tokens: List[str]) -> bool:
+    """
+    Decide between DD/MM and MM/DD for a whole statement: a first component
+    above 12 can only be a day, a second one only a day as well.
+    """
+    for token in tokens:
+        numeric = re.match(r"(\d{1,2})[/-](\d{1,2})", token.strip())
+        if numeric:
+            first, second = int(numeric.group(1)), int(numeric.group(2))
+            if first > 12:
+                return True
+            if second > 12:
+                return False
+    return False
+
+
+def _category(description: str) -> Optional[str]:
+    for category, pattern in CATEGORY_RES:
+        if pattern.search(description):
+            return category
+    return None
+
+
+def parse_statement_transactions(text: str, document_type: str) -> ParsedStatement:
+    """
+    Parse transaction lines of the "date [posting date] description amount
+    [balance]" layouts used by most bank and card statements.
+    """
+    result = ParsedStatement()
+    candidates = [line for line in text.splitlines() if DATE_LINE_RE.match(line)]
+    if not candidates:
+        return result
+
+    matches = [(line, TRANSACTION_LINE_RE.match(line)) for line in candidates]
+    day_first = _is_day_first([match.group("date") for _, match in matches if match])
+    period = _statement_period(text, day_first)
+    is_card = "card" in document_type.lower()
+
+    previous_balance: Optional[float] = None
+    for line, match in matches:
+        if match is None:
+            result.candidate_lines += 1
+            continue
+
+        description = re.sub(r"\s{2,}", " ", match.group("description").strip())
+        amount, marker = _parse_amount(match.group("amount"))
+        balance = _parse_amount(match.group("balance"))[0] if match.group("balance") else None
+        if BALANCE_LINE_RE.search(description):
+            previous_balance = balance if balance is not None else amount
+            continue
+
+        result.candidate_lines += 1
+        transaction_date = _parse_date(match.group("date"), day_first, period)
+        if transaction_date is None:
+            continue
+
+        is_expense = (CARD_MARKERS if is_card else BANK_MARKERS).get(marker)
+        if balance is not None and previous_balance is not None:
+            change = round(balance - previous_balance, 2)
+            result.balance_checks += 1
+            agrees = is_expense is None or is_expense == (change < 0)
+            if abs(abs(change) - amount) < 0.01 and agrees:
+                result.balance_matches += 1
+                is_expense = change < 0
+        if is_expense is None:
+            is_expense = not INCOME_RE.search(description)
+        if balance is not None:
+            previous_balance = balance
+
+        result.transactions.append(
+            {
+                "date": transaction_date.isoformat(),
+                "description": description,
+                "amount": amount,
+                "category": _category(description),
+                "is_expense": is_expense,
+                "is_flagged": False,
+                "flag_reason": None,
+            }
+        )
+
+    if result.candidate_lines:
+        coverage = len(result.transactions) / result.candidate_lines
+        if result.balance_checks:
+            verified = result.balance_matches / result.balance_checks
+            result.confidence = coverage * (0.5 + 0.5 * verified)
+        else:
+            result.confidence = coverage * UNVERIFIED_CONFIDENCE
+    return result
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import uuid
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO, List, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+ALLOWED_UPLOAD_EXTENSIONS = [".pdf", ".png", ".jpg", ".jpeg"]
+
+
+class UploadTooLargeError(Exception):
+    """
+    Raised when an upload exceeds the configured maximum size.
+    """
+
+
+class InvalidBatchUploadError(Exception):
+    """
+    Raised when a batch upload has an unreadable archive or too many files.
+    """
+
+
+@dataclass
+class StoredFile:
+    """
+    A file written to document storage, as recorded on its Document row.
+    """
+
+    filename: str
+    stored_filename: str
+    size: int
+    content_hash: str
+
+
+def stored_filename_for(filename: str) -> str:
+    return f"{uuid.uuid4()}{os.path.splitext(filename)[1].lower()}"
+
+
+def remove_stored_files(files: List[StoredFile]) -> None:
+    for stored in files:
+        file_path = os.path.join(settings.DOCUMENT_STORAGE_PATH, stored.stored_filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+async def hash_upload_file(
+    upload_file: UploadFile,
+    max_size: int = settings.MAX_UPLOAD_SIZE_BYTES,
+) -> Tuple[int, str]:
+    """
+    Hash an upload in chunks without storing it, and rewind it for
+    save_upload_file. The request body is already spooled by then, so this
+    lets a duplicate be recognized before anything is written to document
+    storage.
+
+    Returns the size and SHA-256 hex digest; raises UploadTooLargeError as
+    soon as the upload grows past max_size.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = await upload_file.read(settings.UPLOAD_CHUNK_SIZE_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise UploadTooLargeError(f"File exceeds the maximum upload size of {max_size} bytes")
+        digest.update(chunk)
+    await upload_file.seek(0)
+    return size, digest.hexdigest()
+
+
+async def save_upload_file(
+    upload_file: UploadFile,
+    file_path: str,
+    max_size: int = settings.MAX_UPLOAD_SIZE_BYTES,
+) -> Tuple[int, str]:
+    """
+    Stream an uploaded file to disk in chunks, hashing the bytes as they pass.
+
+    Returns the number of bytes written and the SHA-256 hex digest. The
+    partial file is removed and UploadTooLargeError raised as soon as the
+    upload grows past max_size, without reading the rest of it.
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(file_path, "wb") as buffer:
+            while True:
+                chunk = await upload_file.read(settings.UPLOAD_CHUNK_SIZE_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(
+                        f"File exceeds the maximum upload size of {max_size} bytes"
+                    )
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return size, digest.hexdigest()
+
+
+def save_zip_members(
+    archive: BinaryIO,
+    max_files: int,
+    max_size: int = settings.MAX_UPLOAD_SIZE_BYTES,
+    max_total_size: int = settings.BATCH_UPLOAD_MAX_BYTES,
+) -> Tuple[List[StoredFile], List[str]]:
+    """
+    Stream every member of a ZIP archive with an allowed extension to
+    document storage, one chunk at a time. Returns the stored files and the
+    names of the members that were skipped.
+
+    Sizes are counted from the decompressed bytes rather than trusted from
+    the archive's headers: each member is held to max_size and all of them
+    together to max_total_size, so a small, highly compressed archive cannot
+    fill the disk. On any error the files stored so far are removed.
+    """
+    stored: List[StoredFile] = []
+    skipped: List[str] = []
+    total_size = 0
+    try:
+        with zipfile.ZipFile(archive) as zip_file:
+            for member in zip_file.infolist():
+                name = os.path.basename(member.filename)
+                if member.is_dir() or not name or name.startswith(".") or "__MACOSX" in member.filename:
+                    continue
+                if os.path.splitext(name)[1].lower() not in ALLOWED_UPLOAD_EXTENSIONS:
+                    skipped.append(member.filename)
+                    continue
+                if len(stored) >= max_files:
+                    raise InvalidBatchUploadError(f"Batch uploads are limited to {max_files} files")
+
+                stored_filename = stored_filename_for(name)
+                file_path = os.path.join(settings.DOCUMENT_STORAGE_PATH, stored_filename)
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                stored_file = StoredFile(name, stored_filename, 0, "")
+                stored.append(stored_file)
+                digest = hashlib.sha256()
+                with zip_file.open(member) as source, open(file_path, "wb") as buffer:
+                    while True:
+                        chunk = source.read(settings.UPLOAD_CHUNK_SIZE_BYTES)
+                        if not chunk:
+                            break
+                        stored_file.size += len(chunk)
+                        total_size += len(chunk)
+                        if stored_file.size > max_size:
+                            raise UploadTooLargeError(
+                                f"{member.filename} exceeds the maximum upload size of {max_size} bytes"
+                            )
+                        if total_size > max_total_size:
+                            raise UploadTooLargeError(
+                                f"Batch uploads are limited to {settings.BATCH_UPLOAD_MAX_BYTES} bytes "
+                                "of documents once decompressed"
+                            )
+                        digest.update(chunk)
+                        buffer.write(chunk)
+                stored_file.content_hash = digest.hexdigest()
+    except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+        # RuntimeError: encrypted member; NotImplementedError: unsupported compression
+        remove_stored_files(stored)
+        raise InvalidBatchUploadError(f"Could not read ZIP archive: {e}")
+    except BaseException:
+        remove_stored_files(stored)
+        raise
+    return stored, skipped
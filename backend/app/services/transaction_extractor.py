@@ -1,22 +1,46 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
-from langchain_anthropic import ChatAnthropic
 from app.core.config import settings
+from app.core.metrics import TRANSACTION_EXTRACTIONS
+from app.services.llm_client import TransientLLMError, invoke_llm, is_json_completion
+from app.services.prompt_payload import build_prompt_payload
+from app.services.statement_parser import parse_statement_transactions
 
 
-def extract_transactions(extracted_data: Dict[str, Any], document_type: str) -> List[Dict[str, Any]]:
+def parse_transactions_locally(text: Optional[str], document_type: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return the transactions the local statement parser finds in text, or
+    None when it is disabled or not confident enough to skip the model.
+    """
+    if not text or not settings.STATEMENT_PARSER_ENABLED:
+        return None
+    parsed = parse_statement_transactions(text, document_type)
+    if (
+        parsed.confidence >= settings.STATEMENT_PARSER_MIN_CONFIDENCE
+        and len(parsed.transactions) >= settings.STATEMENT_PARSER_MIN_TRANSACTIONS
+    ):
+        return parsed.transactions
+    return None
+
+
+def extract_transactions(
+    extracted_data: Dict[str, Any], document_type: str, text: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """
     Extract transactions from document data using Anthropic Claude.
+
+    When the document text is given, regular statement layouts are parsed
+    locally first and the model is only called if the parser's confidence
+    is below STATEMENT_PARSER_MIN_CONFIDENCE.
     """
-    # Initialize LLM
-    llm = ChatAnthropic(
-        model="claude-3-haiku-20240307",
-        anthropic_api_key=settings.ANTHROPIC_API_KEY,
-        temperature=0.1,
-    )
+    transactions = parse_transactions_locally(text, document_type)
+    if transactions is not None:
+        TRANSACTION_EXTRACTIONS.labels("fast_path").inc()
+        return transactions
+    TRANSACTION_EXTRACTIONS.labels("llm").inc()
 
     # Prepare data for extraction
-    data_json = json.dumps(extracted_data, indent=2)
+    data_json = build_prompt_payload(extracted_data, "transactions")
 
     # Create the prompt
     prompt = f"""
@@ -56,15 +80,20 @@ def extract_transactions(extracted_data: Dict[str, Any], document_type: str) ->
 
     # Call the LLM
     try:
-        response = llm.invoke(prompt)
+        content = invoke_llm(
+            "claude-3-haiku-20240307",
+            prompt,
+            temperature=0.1,
+            validate=lambda content: is_json_completion(content, "["),
+        )
         
         # Parse the JSON result
         try:
             # Find JSON in the result
-            json_start = response.content.find('[')
-            json_end = response.content.rfind(']') + 1
+            json_start = content.find('[')
+            json_end = content.rfind(']') + 1
             if json_start >= 0 and json_end > json_start:
-                json_str = response.content[json_start:json_end]
+                json_str = content[json_start:json_end]
                 transactions = json.loads(json_str)
                 return transactions
             else:
@@ -73,6 +102,9 @@ def extract_transactions(extracted_data: Dict[str, Any], document_type: str) ->
         except json.JSONDecodeError:
             # If JSON parsing fails, return empty list
             return []
+    except TransientLLMError:
+        # Left to the task to retry rather than stored as a fallback result
+        raise
     except Exception as e:
         print(f"Error calling Anthropic API: {e}")
         return []
@@ -1,34 +1,262 @@
-from celery import Celery
+from celery import Celery, group, signals
 from sqlalchemy.orm import Session
 import os
 import json
+import threading
 from datetime import datetime
+from typing import List
 
 from app.core.config import settings
+from app.core.document_events import publish_document_event
+from app.core.metrics import mark_process_dead, observe_document_processed, start_metrics_server
 from app.database import SessionLocal
 from app import crud, models, schemas
-from app.services.document_processor import process_document
+from app.services.anomaly_detector import apply_anomaly_flags, detect_anomalies
+from app.services.dispute_generator import extract_letter, stream_dispute_letter
+from app.services.dispute_stream import DisputeStreamPublisher
+from app.services.document_processor import extract_document_data, extract_text_from_document
 from app.services.insight_generator import generate_insights
+from app.services.llm_client import TransientLLMError
+from app.services.pipeline import Pipeline, Stage, StageFailedError
 from app.services.transaction_extractor import extract_transactions
 
 celery_app = Celery("worker", broker=settings.REDIS_URL)
 
 celery_app.conf.task_routes = {
-    "app.worker.process_document_task": "main-queue",
+    "app.worker.process_document_task": settings.CELERY_DOCUMENT_QUEUE,
+    "app.worker.generate_dispute_task": settings.CELERY_DISPUTE_QUEUE,
 }
+celery_app.conf.broker_transport_options = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+# Only reserve one task at a time so an interactive upload is not stuck
+# behind a backlog of prefetched bulk tasks.
+celery_app.conf.worker_prefetch_multiplier = 1
+celery_app.conf.task_acks_late = True
+
+
+@signals.worker_init.connect
+def start_worker_metrics(**kwargs):
+    """
+    Serve the worker's metrics from the main worker process. With prefork
+    children, set PROMETHEUS_MULTIPROC_DIR so their metrics are included.
+    """
+    if settings.METRICS_ENABLED and settings.WORKER_METRICS_PORT:
+        start_metrics_server(settings.WORKER_METRICS_PORT)
+
+
+@signals.worker_process_shutdown.connect
+def release_worker_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+DOCUMENT_PRIORITY_LANES = {
+    "interactive": settings.CELERY_INTERACTIVE_PRIORITY,
+    "bulk": settings.CELERY_BULK_PRIORITY,
+}
+
+
+def _in_session(func):
+    """
+    Run func with a session of its own; pipeline stages run on worker threads
+    and must not share the task's session.
+    """
+    db = SessionLocal()
+    try:
+        return func(db)
+    finally:
+        db.close()
+
 
+def build_document_pipeline(
+    document_id: int, document_type: str, file_path: str, cancelled: threading.Event
+) -> Pipeline:
+    """
+    Declare the stages that turn an uploaded file into extracted data,
+    transactions and insights.
 
-@celery_app.task(name="app.worker.process_document_task")
-def process_document_task(document_id: int):
+    Every stage leaves a checkpoint when it completes, so that a retried
+    task can pass the checkpointed outputs to Pipeline.run and resume.
+    Nothing is written once cancelled is set; pass the same event to
+    Pipeline.run so stages abandoned after a failure stay silent.
+    """
+
+    def checkpointed(stage, func):
+        def run(results):
+            output = func(results)
+            if cancelled.is_set():
+                return output
+            try:
+                _in_session(
+                    lambda db: crud.save_pipeline_checkpoint(
+                        db, document_id=document_id, stage=stage, output=output
+                    )
+                )
+            except Exception as e:
+                # Without the checkpoint a retry just runs this stage again
+                print(f"Error saving checkpoint of stage '{stage}' for document {document_id}: {e}")
+            return output
+
+        return run
+
+    def store_with_checkpoint(stage, store):
+        # Rows and checkpoint commit together (the bulk helpers leave the
+        # commit to us): a retry finds both or neither. If another delivery
+        # of the task already recorded the stage, its rows are stored too.
+        def run(db):
+            if not crud.add_pipeline_checkpoint(db, document_id=document_id, stage=stage):
+                db.rollback()
+                return
+            store(db)
+            if cancelled.is_set():
+                db.rollback()
+                return
+            db.commit()
+
+        _in_session(run)
+
+    def extract_text(results):
+        text = extract_text_from_document(file_path)
+        if not text:
+            raise StageFailedError("Failed to extract data from document")
+        return text
+
+    def extract_data(results):
+        return extract_document_data(results["text"], document_type)
+
+    def store_extracted_data(results):
+        store_with_checkpoint(
+            "store_extracted_data",
+            lambda db: crud.update_document_extracted_data(
+                db, document_id=document_id, extracted_data=results["extracted_data"]
+            ),
+        )
+
+    def extract_document_transactions(results):
+        return extract_transactions(results["extracted_data"], document_type, text=results["text"])
+
+    def detect_transaction_anomalies(results):
+        return detect_anomalies(results["transactions"])
+
+    def store_transactions(results):
+        store_with_checkpoint(
+            "store_transactions",
+            lambda db: crud.bulk_create_transactions(
+                db,
+                transactions=[
+                    schemas.TransactionCreate(
+                        date=datetime.fromisoformat(transaction_data["date"]),
+                        description=transaction_data["description"],
+                        amount=transaction_data["amount"],
+                        category=transaction_data.get("category"),
+                        is_expense=transaction_data.get("is_expense", True),
+                        is_flagged=transaction_data.get("is_flagged", False),
+                        flag_reason=transaction_data.get("flag_reason"),
+                        document_id=document_id,
+                    )
+                    for transaction_data in apply_anomaly_flags(
+                        results["transactions"], results["anomalies"]
+                    )
+                ],
+            ),
+        )
+
+    def generate_document_insights(results):
+        # The transactions and findings that are stored, so insights match the flagged rows
+        return generate_insights(
+            results["extracted_data"],
+            results["transactions"],
+            document_type,
+            anomalies=results["anomalies"],
+        )
+
+    def store_insights(results):
+        store_with_checkpoint(
+            "store_insights",
+            lambda db: crud.bulk_create_insights(
+                db,
+                insights=[
+                    schemas.InsightCreate(
+                        insight_type=insight_data["type"],
+                        title=insight_data["title"],
+                        content=insight_data["content"],
+                        importance=insight_data["importance"],
+                        document_id=document_id,
+                    )
+                    for insight_data in results["insights"]
+                ],
+            ),
+        )
+
+    text_timeout = settings.PIPELINE_TEXT_STAGE_TIMEOUT_SECONDS
+    llm_timeout = settings.PIPELINE_LLM_STAGE_TIMEOUT_SECONDS
+    db_timeout = settings.PIPELINE_DB_STAGE_TIMEOUT_SECONDS
+    analysis_timeout = settings.PIPELINE_ANALYSIS_STAGE_TIMEOUT_SECONDS
+    return Pipeline(
+        [
+            Stage("text", checkpointed("text", extract_text), timeout=text_timeout),
+            Stage(
+                "extracted_data",
+                checkpointed("extracted_data", extract_data),
+                ["text"],
+                timeout=llm_timeout,
+            ),
+            Stage("store_extracted_data", store_extracted_data, ["extracted_data"], timeout=db_timeout),
+            Stage(
+                "transactions",
+                checkpointed("transactions", extract_document_transactions),
+                ["text", "extracted_data"],
+                timeout=llm_timeout,
+            ),
+            Stage(
+                "anomalies",
+                checkpointed("anomalies", detect_transaction_anomalies),
+                ["transactions"],
+                timeout=analysis_timeout,
+            ),
+            Stage("store_transactions", store_transactions, ["transactions", "anomalies"], timeout=db_timeout),
+            Stage(
+                "insights",
+                checkpointed("insights", generate_document_insights),
+                ["extracted_data", "transactions", "anomalies"],
+                timeout=llm_timeout,
+            ),
+            Stage("store_insights", store_insights, ["insights"], timeout=db_timeout),
+        ],
+        max_workers=settings.PIPELINE_MAX_WORKERS,
+    )
+
+
+@celery_app.task(
+    bind=True,
+    name="app.worker.process_document_task",
+    autoretry_for=(TransientLLMError,),
+    max_retries=settings.PIPELINE_MAX_RETRIES,
+    retry_backoff=settings.PIPELINE_RETRY_BACKOFF_SECONDS,
+    retry_backoff_max=settings.PIPELINE_RETRY_BACKOFF_MAX_SECONDS,
+    retry_jitter=True,
+)
+def process_document_task(self, document_id: int):
     """
     Process a document in the background.
+
+    Stages checkpointed by an earlier attempt are not run again. Transient
+    model errors are retried with exponential backoff; the document goes
+    back to "pending" in between.
     """
     db = SessionLocal()
+    timings = {}
+    resumed_timings = {}
     try:
         # Get document
         document = crud.get_document(db, document_id=document_id)
         if not document:
             return {"status": "error", "message": "Document not found"}
+        if document.status == "completed":
+            # A redelivered task; running again would store everything twice
+            return {"status": "success", "document_id": document_id, "stage_timings": {}}
 
         # Update status to processing
         crud.update_document_status(db, document_id=document_id, status="processing")
@@ -39,50 +267,134 @@ def process_document_task(document_id: int):
             crud.update_document_status(db, document_id=document_id, status="failed")
             return {"status": "error", "message": "Document file not found"}
 
-        # Process document
-        extracted_data = process_document(file_path, document.document_type)
-        if not extracted_data:
-            crud.update_document_status(db, document_id=document_id, status="failed")
-            return {"status": "error", "message": "Failed to extract data from document"}
-
-        # Update document with extracted data
-        crud.update_document_extracted_data(db, document_id=document_id, extracted_data=extracted_data)
-
-        # Extract transactions
-        transactions = extract_transactions(extracted_data, document.document_type)
-        for transaction_data in transactions:
-            transaction = schemas.TransactionCreate(
-                date=datetime.fromisoformat(transaction_data["date"]),
-                description=transaction_data["description"],
-                amount=transaction_data["amount"],
-                category=transaction_data.get("category"),
-                is_expense=transaction_data.get("is_expense", True),
-                is_flagged=transaction_data.get("is_flagged", False),
-                flag_reason=transaction_data.get("flag_reason"),
-                document_id=document_id,
-            )
-            crud.create_transaction(db, transaction=transaction)
-
-        # Generate insights
-        insights = generate_insights(extracted_data, transactions, document.document_type)
-        for insight_data in insights:
-            insight = schemas.InsightCreate(
-                insight_type=insight_data["type"],
-                title=insight_data["title"],
-                content=insight_data["content"],
-                importance=insight_data["importance"],
-                document_id=document_id,
+        # Run the processing stages, overlapping the ones that do not depend on each other
+        cancelled = threading.Event()
+        pipeline = build_document_pipeline(
+            document_id, document.document_type, file_path, cancelled
+        )
+        checkpoints = crud.get_pipeline_checkpoints(db, document_id=document_id)
+        resumed = {stage: output for stage, output in checkpoints.items() if stage in pipeline.stages}
+        # Resumed stages keep the timings of the attempt that ran them
+        resumed_timings = {
+            stage: seconds
+            for stage, seconds in (document.stage_timings or {}).items()
+            if stage in resumed
+        }
+
+        def report_stage(stage: str, seconds: float):
+            publish_document_event(
+                document.user_id,
+                document_id,
+                "stage",
+                stage=stage,
+                seconds=seconds,
+                completed_stages=len(resumed) + len(timings),
+                total_stages=len(pipeline.stages),
             )
-            crud.create_insight(db, insight=insight)
+
+        pipeline.run(
+            results=resumed, timings=timings, on_stage_complete=report_stage, cancelled=cancelled
+        )
 
         # Update status to completed
+        crud.update_document_stage_timings(
+            db, document_id=document_id, stage_timings={**resumed_timings, **timings}
+        )
         crud.update_document_status(db, document_id=document_id, status="completed")
+        crud.delete_pipeline_checkpoints(db, document_id=document_id)
+        observe_document_processed("completed", timings)
 
-        return {"status": "success", "document_id": document_id}
+        return {"status": "success", "document_id": document_id, "stage_timings": timings}
 
     except Exception as e:
+        db.rollback()
+        if timings:
+            crud.update_document_stage_timings(
+                db, document_id=document_id, stage_timings={**resumed_timings, **timings}
+            )
+        if isinstance(e, TransientLLMError) and self.request.retries < self.max_retries:
+            # autoretry_for schedules the next attempt
+            print(f"Transient model error processing document {document_id}, retrying: {e}")
+            crud.update_document_status(db, document_id=document_id, status="pending")
+            observe_document_processed("retrying", timings)
+            raise
         # Update status to failed
         crud.update_document_status(db, document_id=document_id, status="failed")
+        observe_document_processed("failed", timings)
         return {"status": "error", "message": str(e)}
     finally:
         db.close()
+
+
+def enqueue_document_processing(document_id: int, lane: str = "interactive"):
+    """
+    Queue a document for processing on the given priority lane.
+    """
+    return process_document_task.apply_async(
+        args=[document_id],
+        queue=settings.CELERY_DOCUMENT_QUEUE,
+        priority=DOCUMENT_PRIORITY_LANES[lane],
+    )
+
+
+def enqueue_document_batch(document_ids: List[int], lane: str = "bulk"):
+    """
+    Queue the documents of an upload batch as one group on the given lane,
+    so a large batch does not hold up interactive uploads.
+    """
+    return group(
+        process_document_task.si(document_id).set(
+            queue=settings.CELERY_DOCUMENT_QUEUE,
+            priority=DOCUMENT_PRIORITY_LANES[lane],
+        )
+        for document_id in document_ids
+    ).apply_async()
+
+
+@celery_app.task(name="app.worker.generate_dispute_task")
+def generate_dispute_task(dispute_id: int):
+    """
+    Write the letter for a dispute, relaying the completion to stream
+    readers as it is generated.
+    """
+    db = SessionLocal()
+    publisher = DisputeStreamPublisher(dispute_id)
+    try:
+        dispute = crud.get_dispute(db, dispute_id=dispute_id)
+        if not dispute:
+            return {"status": "error", "message": "Dispute not found"}
+        document = crud.get_document(db, document_id=dispute.document_id)
+
+        publisher.start()
+        parts = []
+        for text in stream_dispute_letter(document, dispute.reason, dispute.details):
+            parts.append(text)
+            publisher.token(text)
+
+        letter_content = extract_letter("".join(parts))
+        crud.update_dispute_letter(
+            db, dispute_id=dispute_id, letter_content=letter_content, status="draft"
+        )
+        publisher.done(letter_content)
+        return {"status": "success", "dispute_id": dispute_id}
+
+    except Exception as e:
+        print(f"Error generating dispute letter: {e}")
+        db.rollback()
+        crud.update_dispute_letter(db, dispute_id=dispute_id, letter_content=None, status="failed")
+        publisher.error(f"Error generating dispute letter: {e}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+
+def enqueue_dispute_generation(dispute_id: int):
+    """
+    Queue a dispute letter on the dispute queue, which long document tasks
+    never occupy; a user is waiting on it, so it takes the interactive lane.
+    """
+    return generate_dispute_task.apply_async(
+        args=[dispute_id],
+        queue=settings.CELERY_DISPUTE_QUEUE,
+        priority=DOCUMENT_PRIORITY_LANES["interactive"],
+    )
@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the document processing pipeline.
+
+    python -m benchmarks.run --help
+"""
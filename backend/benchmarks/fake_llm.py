@@ -0,0 +1,182 @@
+"""
+A deterministic stand-in for ChatAnthropic, so the pipeline can be
+benchmarked offline.
+
+Responses are derived from the prompt: document extraction returns the
+transactions the local statement parser finds in the document text,
+transaction extraction returns the transactions in the payload, and
+insight and dispute prompts get fixed answers. Each call sleeps for a
+fixed latency plus a per-output-token time, to model the API.
+"""
+import json
+import math
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.core.metrics import LLMMetricsHandler
+from app.services import llm_client
+from app.services.statement_parser import parse_statement_transactions
+
+CHARS_PER_TOKEN = 4
+
+INSIGHTS = [
+    {
+        "type": "spending_pattern",
+        "title": "Dining spend is rising",
+        "content": "Dining charges grew month over month.",
+        "importance": 3,
+    },
+    {
+        "type": "fee",
+        "title": "Monthly service fees",
+        "content": "A monthly service fee was charged; a minimum balance may waive it.",
+        "importance": 4,
+    },
+    {
+        "type": "saving_opportunity",
+        "title": "Review subscriptions",
+        "content": "Recurring entertainment charges could be consolidated.",
+        "importance": 2,
+    },
+]
+
+DISPUTE_LETTER = (
+    "Legal analysis: the Fair Credit Billing Act applies.\n\n"
+    "Dear Sir or Madam,\n\nI am writing to dispute the charge described below. "
+    "Please investigate and correct my account within 30 days.\n\nSincerely,\n[Your Name]"
+)
+
+
+def _document_text(prompt: str) -> str:
+    match = re.search(r"Document text(?: \(part \d+ of \d+\))?:\n(.*?)\n\s*(?:Focus on|Return a JSON)", prompt, re.S)
+    return match.group(1) if match else ""
+
+
+def _payload_transactions(prompt: str) -> List[Dict[str, Any]]:
+    match = re.search(r"Document data:\n\s*(\{.*\})\s*\n", prompt)
+    if not match:
+        return []
+    try:
+        data = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return []
+    transactions = data.get("transactions") or []
+    # Trimmed payloads end their lists with an "...N more items omitted" note
+    return [transaction for transaction in transactions if isinstance(transaction, dict)]
+
+
+def fake_completion(prompt: str) -> str:
+    """
+    Return the completion the fake model gives for one of the app's prompts.
+    """
+    if "Transaction Extraction Specialist" in prompt:
+        transactions = [
+            {
+                "date": transaction.get("date"),
+                "description": transaction.get("description"),
+                "amount": transaction.get("amount"),
+                "category": transaction.get("category"),
+                "is_expense": transaction.get("is_expense", True),
+                "is_flagged": False,
+                "flag_reason": None,
+            }
+            for transaction in _payload_transactions(prompt)
+        ]
+        return json.dumps(transactions)
+    if "Document text" in prompt:
+        parsed = parse_statement_transactions(_document_text(prompt), "bank_statement")
+        return json.dumps(
+            {
+                "document_metadata": {"type": "bank_statement", "issuer": "First Synthetic Bank"},
+                "financial_summary": {"transaction_count": len(parsed.transactions)},
+                "transactions": [
+                    {key: transaction[key] for key in ("date", "description", "amount", "category", "is_expense")}
+                    for transaction in parsed.transactions
+                ],
+                "notices": [],
+            }
+        )
+    if "dispute letter" in prompt:
+        return DISPUTE_LETTER
+    return json.dumps(INSIGHTS)
+
+
+def _tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class FakeChatAnthropic(BaseChatModel):
+    """
+    Chat model with ChatAnthropic's model/temperature fields and usage
+    reporting, answering with fake_completion after a simulated delay.
+    """
+
+    model: str
+    temperature: Optional[float] = None
+    latency_seconds: float = 0.5
+    seconds_per_output_token: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-anthropic"
+
+    def _complete(self, messages: List[BaseMessage]) -> Tuple[str, Dict[str, int]]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = fake_completion(prompt)
+        usage = {"input_tokens": _tokens(prompt), "output_tokens": _tokens(content)}
+        return content, usage
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content, usage = self._complete(messages)
+        time.sleep(self.latency_seconds + usage["output_tokens"] * self.seconds_per_output_token)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))],
+            llm_output={"usage": usage},
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        content, _ = self._complete(messages)
+        time.sleep(self.latency_seconds)
+        for text in re.findall(r"\S+\s*", content):
+            time.sleep(_tokens(text) * self.seconds_per_output_token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+def install_fake_llm(latency_seconds: float = 0.5, seconds_per_output_token: float = 0.0) -> None:
+    """
+    Make app.services.llm_client hand out FakeChatAnthropic models, for
+    this process.
+    """
+    models: Dict[Tuple[str, Optional[float]], FakeChatAnthropic] = {}
+
+    def get_fake_llm(model: str, temperature: Optional[float] = None) -> FakeChatAnthropic:
+        key = (model, temperature)
+        if key not in models:
+            models[key] = FakeChatAnthropic(
+                model=model,
+                temperature=temperature,
+                latency_seconds=latency_seconds,
+                seconds_per_output_token=seconds_per_output_token,
+                callbacks=[LLMMetricsHandler(model)],
+            )
+        return models[key]
+
+    llm_client.get_llm = get_fake_llm
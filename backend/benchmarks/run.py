@@ -0,0 +1,251 @@
+"""
+Benchmark process_document_task end to end on synthetic statements, with a
+fake model instead of the Anthropic API. Needs no network or Redis; PNG
+documents need a local Tesseract.
+
+    python -m benchmarks.run --sizes 10,100,500 --documents 5
+    python -m benchmarks.run --database-url postgresql://postgres@localhost/fingenius_bench
+    python -m benchmarks.run --no-statement-parser --llm-seconds-per-token 0.01 --output before.json
+
+Documents are processed in daemonic child processes, one at a time each,
+as in a Celery prefork worker, so code that cannot run there (such as
+starting a process pool) fails here too; --concurrency is the number of
+children. Documents/sec and mean seconds per pipeline stage are reported
+per format and statement size. Use a scratch database: tables are created
+if missing and benchmark rows are left in place.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Longest wait for any one document before the benchmark gives up on a child
+RESULT_TIMEOUT_SECONDS = 600
+
+
+def _configure_environment(storage_path: str, args: argparse.Namespace) -> None:
+    """
+    Settings are read when app modules are imported, so these must be set first.
+    """
+    os.environ["DOCUMENT_STORAGE_PATH"] = storage_path
+    # Every run must pay for its model calls, and nothing may reach for Redis
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["LLM_CACHE_REDIS_ENABLED"] = "false"
+    os.environ["OCR_CACHE_REDIS_ENABLED"] = "false"
+    os.environ["DOCUMENT_EVENTS_ENABLED"] = "false"
+    if args.no_statement_parser:
+        os.environ["STATEMENT_PARSER_ENABLED"] = "false"
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def _prefork_child(engine, tasks, results) -> None:
+    """
+    Process documents the way a Celery prefork child does: in a daemonic
+    process, one at a time.
+    """
+    # Connections inherited from the parent must not be used in the child
+    engine.dispose(close=False)
+    from app.worker import process_document_task
+
+    for document_id in iter(tasks.get, None):
+        try:
+            # .run is the task body; calling the task object needs Celery's request stack
+            result = process_document_task.run(document_id)
+        except Exception as e:
+            result = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+        results.put((document_id, result))
+
+
+def _process_documents(engine, document_ids: List[int], concurrency: int) -> List[Dict[str, Any]]:
+    context = multiprocessing.get_context("fork")
+    tasks, results = context.Queue(), context.Queue()
+    for document_id in document_ids:
+        tasks.put(document_id)
+    children = [
+        context.Process(target=_prefork_child, args=(engine, tasks, results), daemon=True)
+        for _ in range(concurrency)
+    ]
+    for child in children:
+        tasks.put(None)
+        child.start()
+    try:
+        by_id = dict(results.get(timeout=RESULT_TIMEOUT_SECONDS) for _ in document_ids)
+    finally:
+        for child in children:
+            child.join(timeout=5)
+            if child.is_alive():
+                child.terminate()
+    return [by_id[document_id] for document_id in document_ids]
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    storage_path = tempfile.mkdtemp(prefix="fingenius-bench-")
+    _configure_environment(storage_path, args)
+
+    from sqlalchemy import create_engine
+
+    from app import crud, models, schemas
+    from app.database import SessionLocal
+    from benchmarks.fake_llm import install_fake_llm
+    from benchmarks.synthetic import (
+        MAX_PNG_LINES,
+        generate_transactions,
+        statement_lines,
+        write_statement_pdf,
+        write_statement_png,
+    )
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(storage_path, 'bench.db')}"
+    if database_url.startswith("sqlite"):
+        # Pipeline stages write from several threads at once
+        engine = create_engine(database_url, connect_args={"timeout": 30})
+    else:
+        engine = create_engine(database_url, pool_size=args.concurrency * 4)
+    models.Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+    install_fake_llm(args.llm_latency, args.llm_seconds_per_token)
+
+    db = SessionLocal()
+    user = models.User(
+        email=f"bench-{time.time_ns()}@example.com", hashed_password="-", full_name="Benchmark"
+    )
+    db.add(user)
+    db.commit()
+
+    has_tesseract = shutil.which("tesseract") is not None
+    groups = []
+    for file_format in args.formats:
+        for size in args.sizes:
+            if file_format == "png" and not has_tesseract:
+                print(f"Skipping png/{size}: tesseract is not installed")
+                continue
+            if file_format == "png" and size + 7 > MAX_PNG_LINES:
+                print(f"Skipping png/{size}: a PNG page holds at most {MAX_PNG_LINES - 7} transactions")
+                continue
+
+            document_ids = []
+            for index in range(args.documents):
+                lines = statement_lines(generate_transactions(size, seed=args.seed + index))
+                stored_filename = f"{file_format}-{size}-{index}-{time.time_ns()}.{file_format}"
+                file_path = os.path.join(storage_path, stored_filename)
+                if file_format == "pdf":
+                    write_statement_pdf(file_path, lines)
+                else:
+                    write_statement_png(file_path, lines, seed=args.seed + index)
+                document = crud.create_document(
+                    db,
+                    schemas.DocumentCreate(
+                        filename=stored_filename,
+                        stored_filename=stored_filename,
+                        document_type="bank_statement",
+                    ),
+                    user.id,
+                )
+                document_ids.append(document.id)
+
+            started_at = time.perf_counter()
+            results = _process_documents(engine, document_ids, args.concurrency)
+            elapsed = time.perf_counter() - started_at
+
+            groups.append(_summarize(db, file_format, size, document_ids, results, elapsed))
+            _print_group(groups[-1])
+
+    db.close()
+    shutil.rmtree(storage_path, ignore_errors=True)
+    return {
+        "commit": _commit(),
+        "database": engine.dialect.name,
+        "llm_latency_seconds": args.llm_latency,
+        "llm_seconds_per_output_token": args.llm_seconds_per_token,
+        "statement_parser": not args.no_statement_parser,
+        "concurrency": args.concurrency,
+        "groups": groups,
+    }
+
+
+def _summarize(db, file_format, size, document_ids, results, elapsed) -> Dict[str, Any]:
+    from app import models
+
+    timings = [result.get("stage_timings", {}) for result in results if result["status"] == "success"]
+    stages = sorted({stage for timing in timings for stage in timing})
+    transaction_counts = [
+        db.query(models.Transaction).filter(models.Transaction.document_id == document_id).count()
+        for document_id in document_ids
+    ]
+    totals = [sum(timing.values()) for timing in timings]
+    return {
+        "format": file_format,
+        "transactions": size,
+        "documents": len(document_ids),
+        "failed": len(results) - len(timings),
+        "seconds": round(elapsed, 3),
+        "documents_per_second": round(len(document_ids) / elapsed, 3) if elapsed else None,
+        "stage_seconds_total_p50": round(_percentile(totals, 0.5), 3) if totals else None,
+        "stage_seconds_total_p95": round(_percentile(totals, 0.95), 3) if totals else None,
+        "mean_transactions_stored": round(statistics.mean(transaction_counts), 1),
+        "mean_stage_seconds": {
+            stage: round(statistics.mean(timing.get(stage, 0.0) for timing in timings), 4)
+            for stage in stages
+        },
+    }
+
+
+def _print_group(group: Dict[str, Any]) -> None:
+    print(
+        f"{group['format']}/{group['transactions']} transactions: "
+        f"{group['documents']} documents in {group['seconds']:.2f}s "
+        f"({group['documents_per_second']:.2f} docs/s, {group['failed']} failed, "
+        f"{group['mean_transactions_stored']:.0f} transactions stored per document)"
+    )
+    for stage, seconds in group["mean_stage_seconds"].items():
+        print(f"    {stage:<22} {seconds:8.4f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,500", help="transactions per statement, comma separated")
+    parser.add_argument("--documents", type=int, default=5, help="documents per format and size")
+    parser.add_argument("--formats", default="pdf,png", help="pdf, png or both")
+    parser.add_argument("--concurrency", type=int, default=1, help="worker child processes")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per fake model call")
+    parser.add_argument(
+        "--llm-seconds-per-token", type=float, default=0.0, help="extra seconds per output token"
+    )
+    parser.add_argument(
+        "--no-statement-parser", action="store_true", help="always extract transactions with the model"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    args.formats = [file_format.strip() for file_format in args.formats.split(",")]
+
+    report = run_benchmark(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Synthetic bank statements with a known number of transactions, written as
+text PDFs or scanned-looking PNGs. Output is deterministic for a seed.
+"""
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+from PIL import Image, ImageDraw, ImageFont
+
+MERCHANTS = [
+    ("WHOLE FOODS MARKET", "Groceries", 20, 180),
+    ("STARBUCKS STORE", "Dining", 4, 15),
+    ("SHELL OIL", "Transportation", 30, 90),
+    ("AMAZON MKTPLACE", "Shopping", 10, 250),
+    ("NETFLIX.COM", "Entertainment", 15.49, 15.49),
+    ("CITY ELECTRIC UTILITY", "Utilities", 60, 160),
+    ("UBER TRIP", "Transportation", 8, 45),
+    ("PIZZA PALACE", "Dining", 15, 60),
+    ("TARGET STORE", "Shopping", 12, 140),
+    ("MONTHLY SERVICE FEE", "Fees", 12, 12),
+]
+INCOME = [("PAYROLL DIRECT DEP ACME CORP", 2400, 3200), ("ZELLE TRANSFER FROM J SMITH", 50, 400)]
+
+LINES_PER_PDF_PAGE = 55
+# A PNG is one page; longer statements would be downscaled past legibility for OCR
+MAX_PNG_LINES = 60
+
+
+def generate_transactions(count: int, seed: int = 0, start: date = date(2024, 1, 2)) -> List[Dict[str, Any]]:
+    """
+    Return count transactions spread over about three months, oldest first.
+    Roughly one in eight is income.
+    """
+    rng = random.Random(f"{seed}:{count}")
+    span_days = 89
+    transactions = []
+    for index in range(count):
+        day = start + timedelta(days=index * span_days // max(count, 1))
+        if rng.random() < 0.125:
+            description, low, high = rng.choice(INCOME)
+            category, is_expense = "Income", False
+        else:
+            description, category, low, high = rng.choice(MERCHANTS)
+            is_expense = True
+        if category not in ("Income", "Fees", "Entertainment"):
+            description = f"{description} #{rng.randint(1000, 9999)}"
+        transactions.append(
+            {
+                "date": day.isoformat(),
+                "description": description,
+                "amount": round(rng.uniform(low, high), 2),
+                "category": category,
+                "is_expense": is_expense,
+            }
+        )
+    return transactions
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def statement_lines(transactions: List[Dict[str, Any]], opening_balance: float = 2500.0) -> List[str]:
+    """
+    Render transactions in the "date description amount balance" layout of
+    a bank statement, debits with a leading minus, between opening and
+    closing balance lines.
+    """
+    first = date.fromisoformat(transactions[0]["date"]) if transactions else date(2024, 1, 1)
+    last = date.fromisoformat(transactions[-1]["date"]) if transactions else first
+    lines = [
+        "FIRST SYNTHETIC BANK",
+        "Account number: ****4821",
+        f"Statement period: {first:%B} {first.day}, {first.year} - {last:%B} {last.day}, {last.year}",
+        "",
+        "Date        Description                          Amount       Balance",
+        f"{first:%m/%d/%Y}  Opening balance  {_money(opening_balance)}",
+    ]
+    balance = opening_balance
+    for transaction in transactions:
+        day = date.fromisoformat(transaction["date"])
+        amount = transaction["amount"]
+        balance = round(balance - amount if transaction["is_expense"] else balance + amount, 2)
+        signed = f"-{_money(amount)}" if transaction["is_expense"] else _money(amount)
+        lines.append(f"{day:%m/%d/%Y}  {transaction['description']}  {signed}  {_money(balance)}")
+    lines.append(f"{last:%m/%d/%Y}  Closing balance  {_money(balance)}")
+    return lines
+
+
+def _pdf_text(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_statement_pdf(path: str, lines: List[str]) -> int:
+    """
+    Write lines as a text PDF with LINES_PER_PDF_PAGE lines per page and
+    return the page count.
+    """
+    pages = [lines[start : start + LINES_PER_PDF_PAGE] for start in range(0, len(lines), LINES_PER_PDF_PAGE)]
+    pages = pages or [[]]
+    # Objects: catalog, page tree, font, then a page and its content stream per page
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * index} 0 R" for index in range(len(pages))), len(pages)
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for index, page_lines in enumerate(pages):
+        stream = "BT /F1 9 Tf 40 760 Td 13 TL " + " ".join(
+            f"({_pdf_text(line)}) Tj T*" for line in page_lines
+        ) + " ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+    with open(path, "wb") as file:
+        file.write(output)
+    return len(pages)
+
+
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype("DejaVuSansMono.ttf", size)
+    except OSError:
+        try:
+            return ImageFont.truetype("DejaVuSans.ttf", size)
+        except OSError:
+            return ImageFont.load_default()
+
+
+def write_statement_png(path: str, lines: List[str], seed: int = 0) -> None:
+    """
+    Render lines onto a letter-size page at 200 DPI, slightly rotated, like
+    a phone photo of a printed statement.
+    """
+    if len(lines) > MAX_PNG_LINES:
+        raise ValueError(f"PNG statements hold at most {MAX_PNG_LINES} lines, got {len(lines)}")
+    image = Image.new("L", (1700, 2200), color=255)
+    draw = ImageDraw.Draw(image)
+    font = _font(24)
+    for index, line in enumerate(lines):
+        draw.text((90, 90 + index * 34), line, fill=20, font=font)
+    angle = random.Random(seed).uniform(-0.6, 0.6)
+    image.rotate(angle, fillcolor=255, expand=False).save(path)
@@ -0,0 +1,132 @@
+from app.services.anomaly_detector import (
+    apply_anomaly_flags,
+    detect_anomalies,
+    summarize_transactions,
+)
+
+
+def transaction(date, description, amount, category="Dining", is_expense=True):
+    return {
+        "date": date,
+        "description": description,
+        "amount": amount,
+        "category": category,
+        "is_expense": is_expense,
+    }
+
+
+def findings_by_type(transactions):
+    found = {}
+    for finding in detect_anomalies(transactions):
+        found.setdefault(finding["type"], []).append(finding["index"])
+    return found
+
+
+def test_duplicate_charges_within_the_window():
+    transactions = [
+        transaction("2024-03-05", "COFFEE SHOP 0412", 4.50),
+        transaction("2024-03-06", "COFFEE SHOP 0413", 4.50),
+        transaction("2024-03-20", "COFFEE SHOP 0414", 4.50),
+    ]
+
+    assert findings_by_type(transactions) == {"duplicate_charge": [1]}
+
+
+def test_amount_outlier_within_its_category():
+    transactions = [
+        transaction(f"2024-03-0{day}", f"CAFE {name}", amount)
+        for day, name, amount in [(1, "A", 5.0), (2, "B", 6.0), (3, "C", 5.5), (4, "D", 6.5)]
+    ] + [transaction("2024-03-05", "FANCY RESTAURANT", 250.0)]
+
+    assert findings_by_type(transactions) == {"amount_outlier": [4]}
+
+
+def test_fees_and_income_are_told_apart():
+    transactions = [
+        transaction("2024-03-12", "MONTHLY SERVICE FEE", 12.0, "Fees"),
+        transaction("2024-03-13", "INTEREST PAID", 3.0, "Income", is_expense=False),
+    ]
+
+    assert findings_by_type(transactions) == {"fee": [0]}
+
+
+def test_recurring_charge_that_changed_amount():
+    transactions = [
+        transaction("2024-01-01", "NETFLIX.COM*AB12", 15.99, "Entertainment"),
+        transaction("2024-02-01", "NETFLIX.COM*CD34", 15.99, "Entertainment"),
+        transaction("2024-03-01", "NETFLIX.COM*EF56", 22.99, "Entertainment"),
+    ]
+
+    assert findings_by_type(transactions) == {"merchant_change": [2]}
+
+
+def test_descriptions_without_a_merchant_name():
+    transactions = [
+        transaction("2024-03-01", "AMZN*1X2Y3", 5.0),
+        transaction("2024-03-01", "123456", 5.0),
+    ]
+
+    assert detect_anomalies(transactions) == []
+
+
+def test_no_expenses():
+    assert detect_anomalies([]) == []
+    assert detect_anomalies([transaction("2024-03-01", "SALARY", 3000.0, "Income", False)]) == []
+
+
+def test_apply_flags_keeps_existing_reasons():
+    transactions = [
+        {"description": "A", "is_flagged": True, "flag_reason": "Flagged by the model"},
+        {"description": "B", "is_flagged": False, "flag_reason": None},
+        {"description": "C", "is_flagged": False, "flag_reason": None},
+    ]
+    findings = [{"index": 0, "reason": "Fee"}, {"index": 1, "reason": "Duplicate"}]
+
+    flagged = apply_anomaly_flags(transactions, findings)
+
+    assert [t["flag_reason"] for t in flagged] == ["Flagged by the model; Fee", "Duplicate", None]
+    assert [t["is_flagged"] for t in flagged] == [True, True, False]
+    assert transactions[1]["is_flagged"] is False
+
+
+def test_summary_totals_and_anomaly_groups():
+    transactions = [
+        transaction("2024-03-05", "COFFEE SHOP", 4.50),
+        transaction("2024-03-06", "COFFEE SHOP", 4.50),
+        transaction("2024-03-12", "LATE FEE", 25.0, "Fees"),
+        transaction("2024-03-13", "SALARY", 3000.0, "Income", is_expense=False),
+    ]
+
+    summary = summarize_transactions(transactions, max_examples=1)
+
+    assert summary["transaction_count"] == 4
+    assert summary["date_range"] == ["2024-03-05", "2024-03-13"]
+    assert summary["total_expenses"] == 34.0
+    assert summary["total_income"] == 3000.0
+    assert summary["expenses_by_category"] == {"Fees": 25.0, "Dining": 9.0}
+    assert summary["top_merchants"] == [{"description": "LATE FEE", "total": 25.0, "count": 1}]
+    assert {kind: group["count"] for kind, group in summary["anomalies"].items()} == {
+        "duplicate_charge": 1,
+        "fee": 1,
+    }
+
+
+def test_malformed_amounts_are_skipped():
+    transactions = [
+        transaction("2024-03-05", "COFFEE SHOP", "4.50 USD"),
+        transaction("2024-03-05", "COFFEE SHOP", float("inf")),
+        transaction("2024-03-05", "COFFEE SHOP", float("nan")),
+        transaction("2024-03-06", "COFFEE SHOP", 4.50),
+    ]
+
+    assert detect_anomalies(transactions) == []
+
+
+def test_is_expense_given_as_strings():
+    transactions = [
+        transaction("2024-03-12", "LATE FEE REVERSAL", 25.0, "Fees", is_expense="false"),
+        transaction("2024-03-13", "LATE FEE", 25.0, "Fees", is_expense="true"),
+        transaction("2024-03-14", "ANNUAL FEE", 95.0, "Fees", is_expense=None),
+    ]
+
+    assert findings_by_type(transactions) == {"fee": [1, 2]}
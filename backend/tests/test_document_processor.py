@@ -0,0 +1,63 @@
+import multiprocessing
+
+import pytest
+
+from app.core.config import settings
+from app.services import document_processor
+from app.services.document_processor import iter_pdf_pages
+from benchmarks.synthetic import LINES_PER_PDF_PAGE, write_statement_pdf
+
+
+@pytest.fixture(autouse=True)
+def small_ranges(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_PAGES_PER_TASK", 2)
+    monkeypatch.setattr(settings, "PDF_EXTRACT_WORKERS", 2)
+
+
+def statement_pdf(path, pages):
+    write_statement_pdf(
+        str(path),
+        [f"Page {page} line {line}" for page in range(pages) for line in range(LINES_PER_PDF_PAGE)],
+    )
+    return str(path)
+
+
+def first_lines(pages):
+    return [text.splitlines()[0] for text in pages]
+
+
+def _pages_in_child(pdf_path, results):
+    try:
+        results.put(first_lines(iter_pdf_pages(pdf_path)))
+    except BaseException as e:
+        results.put(e)
+
+
+def test_single_range_is_read_in_process(tmp_path, monkeypatch):
+    def submit(*args, **kwargs):
+        raise AssertionError("a PDF of one range was sent to the pool")
+
+    monkeypatch.setattr(document_processor.pdf_pool, "submit", submit)
+
+    pages = iter_pdf_pages(statement_pdf(tmp_path / "short.pdf", 3))
+
+    assert first_lines(pages) == ["Page 0 line 0", "Page 1 line 0", "Page 2 line 0"]
+
+
+def test_ranges_are_yielded_in_page_order(tmp_path):
+    pages = iter_pdf_pages(statement_pdf(tmp_path / "long.pdf", 7))
+
+    assert first_lines(pages) == [f"Page {page} line 0" for page in range(7)]
+
+
+def test_pdf_from_a_daemonic_process(tmp_path):
+    # Celery's prefork children are daemonic and cannot start processes of their own
+    pdf_path = statement_pdf(tmp_path / "long.pdf", 7)
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=_pages_in_child, args=(pdf_path, results), daemon=True)
+    child.start()
+    try:
+        assert results.get(timeout=30) == [f"Page {page} line 0" for page in range(7)]
+    finally:
+        child.join(timeout=5)
@@ -0,0 +1,54 @@
+import io
+import multiprocessing
+
+import pytest
+from PIL import Image
+
+from app.core.cache import TieredCache
+from app.services import ocr
+
+
+@pytest.fixture(autouse=True)
+def offline_ocr(monkeypatch):
+    monkeypatch.setattr(
+        ocr.pytesseract, "image_to_string", lambda image, config=None: f"{image.mode} {image.size}"
+    )
+    cache = TieredCache("ocr-test", ttl_seconds=60, max_entries=8, max_bytes=4096, use_redis=False)
+    monkeypatch.setattr(ocr, "ocr_cache", cache)
+
+
+def png(size=(40, 20), mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _ocr_in_child(data, results):
+    try:
+        results.put(ocr.ocr_image(data))
+    except BaseException as e:
+        results.put(e)
+
+
+def test_ocr_normalizes_and_caches(monkeypatch):
+    data = png()
+
+    assert ocr.ocr_image(data) == "L (40, 20)"
+
+    def fail(image, config=None):
+        raise AssertionError("OCR ran again for identical bytes")
+
+    monkeypatch.setattr(ocr.pytesseract, "image_to_string", fail)
+    assert ocr.ocr_image(data) == "L (40, 20)"
+
+
+def test_ocr_from_a_daemonic_process():
+    # Celery's prefork children are daemonic and cannot start processes of their own
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=_ocr_in_child, args=(png(), results), daemon=True)
+    child.start()
+    try:
+        assert results.get(timeout=30) == "L (40, 20)"
+    finally:
+        child.join(timeout=5)
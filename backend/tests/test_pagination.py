@@ -0,0 +1,33 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    position = datetime(2024, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+    assert decode_cursor(encode_cursor(position, 42)) == (position, 42)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2024, 3, 1, tzinfo=timezone.utc), 2**40)
+
+    assert all(c.isalnum() or c in "-_=" for c in cursor)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        base64.urlsafe_b64encode(b"[1, 2, 3]").decode(),
+        base64.urlsafe_b64encode(b'["yesterday", 1]').decode(),
+        base64.urlsafe_b64encode(b'["2024-03-01T00:00:00", "x"]').decode(),
+        "é",
+    ],
+)
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
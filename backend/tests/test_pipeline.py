@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from app.services.pipeline import Pipeline, Stage, StageFailedError, StageTimeoutError
+
+
+def test_runs_stages_after_their_dependencies():
+    pipeline = Pipeline(
+        [
+            Stage("total", lambda results: results["a"] + results["b"], depends_on=["a", "b"]),
+            Stage("a", lambda results: 1),
+            Stage("b", lambda results: 2),
+        ]
+    )
+
+    assert pipeline.run() == {"a": 1, "b": 2, "total": 3}
+
+
+def test_rejects_dependency_cycles():
+    with pytest.raises(ValueError, match="cycle among: a, b"):
+        Pipeline(
+            [
+                Stage("a", lambda results: 1, depends_on=["b"]),
+                Stage("b", lambda results: 2, depends_on=["a"]),
+                Stage("c", lambda results: 3),
+            ]
+        )
+
+
+def test_rejects_unknown_dependencies():
+    with pytest.raises(ValueError, match="unknown stage 'missing'"):
+        Pipeline([Stage("a", lambda results: 1, depends_on=["missing"])])
+
+
+def test_resumes_from_earlier_results():
+    calls = []
+
+    def stage(name, value):
+        def run(results):
+            calls.append(name)
+            return value(results)
+
+        return Stage(name, run, depends_on=["text"] if name != "text" else [])
+
+    pipeline = Pipeline(
+        [
+            stage("text", lambda results: "fresh"),
+            stage("extracted", lambda results: results["text"].upper()),
+        ]
+    )
+    timings = {}
+
+    results = pipeline.run(results={"text": "resumed"}, timings=timings)
+
+    assert calls == ["extracted"]
+    assert results == {"text": "resumed", "extracted": "RESUMED"}
+    assert list(timings) == ["extracted"]
+
+
+def test_independent_stages_overlap():
+    pipeline = Pipeline([Stage(name, lambda results: time.sleep(0.2)) for name in "abc"])
+
+    started_at = time.monotonic()
+    pipeline.run()
+
+    assert time.monotonic() - started_at < 0.5
+
+
+def test_failure_sets_cancelled_for_abandoned_stages():
+    cancelled = threading.Event()
+    finished = threading.Event()
+    writes = []
+
+    def slow(results):
+        time.sleep(0.2)
+        if not cancelled.is_set():
+            writes.append("slow")
+        finished.set()
+
+    def fail(results):
+        raise StageFailedError("No text")
+
+    pipeline = Pipeline([Stage("slow", slow), Stage("fail", fail)])
+
+    with pytest.raises(StageFailedError):
+        pipeline.run(cancelled=cancelled)
+    assert cancelled.is_set()
+    assert finished.wait(1)
+    assert writes == []
+
+
+def test_stage_timeout():
+    timings = {}
+    pipeline = Pipeline([Stage("slow", lambda results: time.sleep(0.5), timeout=0.05)])
+
+    with pytest.raises(StageTimeoutError):
+        pipeline.run(timings=timings)
+    assert timings["slow"] < 0.5
@@ -0,0 +1,68 @@
+import json
+
+from prometheus_client import REGISTRY
+
+from app.services.prompt_payload import CHARS_PER_TOKEN, build_prompt_payload
+
+
+def trimmed_count(stage):
+    return REGISTRY.get_sample_value("fingenius_prompt_payloads_trimmed_total", {"stage": stage}) or 0
+
+
+def test_compact_json_without_pruned_or_empty_fields():
+    data = {
+        "account": {"holder": "A. Person", "number": None, "notes": ""},
+        "transactions": [{"description": "Coffee", "amount": 4.5, "category": None}],
+        "extraction_status": "success",
+        "raw_text": "01/03 Coffee 4.50",
+    }
+
+    payload = build_prompt_payload(data, "transactions", budget_tokens=None)
+
+    assert payload == json.dumps(
+        {
+            "account": {"holder": "A. Person"},
+            "transactions": [{"description": "Coffee", "amount": 4.5}],
+            "raw_text": "01/03 Coffee 4.50",
+        },
+        separators=(",", ":"),
+    )
+
+
+def test_stage_specific_pruning():
+    data = {
+        "transactions": [{"description": "Coffee", "amount": 4.5}],
+        "transaction_summary": {"transaction_count": 1},
+        "raw_text": "01/03 Coffee 4.50",
+    }
+
+    assert json.loads(build_prompt_payload(data, "insights")) == {
+        "transaction_summary": {"transaction_count": 1}
+    }
+    assert "raw_text" not in json.loads(build_prompt_payload(data, "dispute"))
+
+
+def test_trims_the_largest_list_to_the_budget():
+    data = {
+        "statement_period": "March 2024",
+        "transactions": [{"description": f"Purchase {i}", "amount": i} for i in range(200)],
+    }
+    before = trimmed_count("transactions")
+
+    payload = build_prompt_payload(data, "transactions", budget_tokens=200)
+
+    assert len(payload) <= 200 * CHARS_PER_TOKEN
+    trimmed = json.loads(payload)
+    assert trimmed["statement_period"] == "March 2024"
+    assert trimmed["transactions"][0] == {"description": "Purchase 0", "amount": 0}
+    kept = len(trimmed["transactions"]) - 1
+    assert trimmed["transactions"][-1] == f"...{200 - kept} more items omitted"
+    assert trimmed_count("transactions") == before + 1
+
+
+def test_payload_within_budget_is_not_trimmed():
+    before = trimmed_count("dispute")
+
+    build_prompt_payload({"merchant": "Coffee Shop"}, "dispute", budget_tokens=100)
+
+    assert trimmed_count("dispute") == before
@@ -0,0 +1,89 @@
+from app.services.statement_parser import parse_statement_transactions
+
+BANK_STATEMENT = """First Bank statement for 01/01/2024 - 01/31/2024
+01/02 Opening balance 1,000.00
+01/03 STARBUCKS #123 4.50 995.50
+01/05 PAYROLL ACME INC 2,000.00 2,995.50
+01/07 Unreadable line
+01/09 AMAZON MKTP 45.99 2,949.51
+"""
+
+
+def test_parses_rows_and_skips_balance_lines():
+    result = parse_statement_transactions(BANK_STATEMENT, "bank_statement")
+
+    assert [t["description"] for t in result.transactions] == [
+        "STARBUCKS #123",
+        "PAYROLL ACME INC",
+        "AMAZON MKTP",
+    ]
+    assert [t["date"] for t in result.transactions] == ["2024-01-03", "2024-01-05", "2024-01-09"]
+    assert [t["amount"] for t in result.transactions] == [4.5, 2000.0, 45.99]
+    assert [t["category"] for t in result.transactions] == ["Dining", "Income", "Shopping"]
+
+
+def test_running_balance_decides_direction():
+    result = parse_statement_transactions(BANK_STATEMENT, "bank_statement")
+
+    assert [t["is_expense"] for t in result.transactions] == [True, False, True]
+    assert result.balance_checks == 3
+    assert result.balance_matches == 3
+
+
+def test_confidence_counts_unparsed_lines():
+    result = parse_statement_transactions(BANK_STATEMENT, "bank_statement")
+
+    # Three of four candidate lines parsed, all of them verified by the balance
+    assert result.candidate_lines == 4
+    assert result.confidence == 0.75
+
+
+def test_card_markers_and_day_first_dates():
+    text = """Card statement
+13/03/2024 NETFLIX.COM 15.99
+14/03/2024 PAYMENT THANK YOU 200.00 CR
+"""
+    result = parse_statement_transactions(text, "credit_card_statement")
+
+    assert [t["date"] for t in result.transactions] == ["2024-03-13", "2024-03-14"]
+    assert [t["is_expense"] for t in result.transactions] == [True, False]
+    # No running balance to verify against
+    assert result.confidence == 0.9
+
+
+def test_text_without_statement_lines():
+    result = parse_statement_transactions("Nothing that looks like a statement", "bank_statement")
+
+    assert result.transactions == []
+    assert result.confidence == 0.0
+
+
+def test_rows_of_a_period_across_new_year():
+    text = """Statement period 12/15/2023 - 01/14/2024
+12/16 Opening balance 1,000.00
+12/20 STARBUCKS 4.50 995.50
+01/03 SHELL OIL 40.00 955.50
+"""
+    result = parse_statement_transactions(text, "bank_statement")
+
+    assert [t["date"] for t in result.transactions] == ["2023-12-20", "2024-01-03"]
+
+
+def test_day_first_rows_of_a_period_across_new_year():
+    text = """Statement period 15 Dec 2023 to 14 Jan 2024
+20/12 STARBUCKS 4.50
+03/01 SHELL OIL 40.00
+"""
+    result = parse_statement_transactions(text, "bank_statement")
+
+    assert [t["date"] for t in result.transactions] == ["2023-12-20", "2024-01-03"]
+
+
+def test_old_dates_elsewhere_do_not_move_the_period():
+    text = """Customer since 03/02/2011
+Statement period 03/01/2024 - 03/31/2024
+03/05 STARBUCKS 4.50
+"""
+    result = parse_statement_transactions(text, "bank_statement")
+
+    assert [t["date"] for t in result.transactions] == ["2024-03-05"]
@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.services.storage import (
+    InvalidBatchUploadError,
+    UploadTooLargeError,
+    hash_upload_file,
+    save_zip_members,
+)
+
+
+@pytest.fixture(autouse=True)
+def document_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENT_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE_BYTES", 64)
+    return tmp_path
+
+
+def archive(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in members.items():
+            zip_file.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def test_stores_allowed_members_and_skips_the_rest(document_storage):
+    stored, skipped = save_zip_members(
+        archive(
+            {
+                "jan.pdf": b"%PDF jan",
+                "scans/feb.PNG": b"png",
+                "notes.txt": b"notes",
+                "__MACOSX/._jan.pdf": b"resource fork",
+                ".hidden.pdf": b"hidden",
+            }
+        ),
+        max_files=10,
+    )
+
+    assert [(f.filename, f.size) for f in stored] == [("jan.pdf", 8), ("feb.PNG", 3)]
+    assert stored[0].content_hash == hashlib.sha256(b"%PDF jan").hexdigest()
+    assert stored[1].stored_filename.endswith(".png")
+    assert skipped == ["notes.txt"]
+    assert sorted(os.listdir(document_storage)) == sorted(f.stored_filename for f in stored)
+
+
+def test_too_many_files(document_storage):
+    with pytest.raises(InvalidBatchUploadError, match="limited to 1 files"):
+        save_zip_members(archive({"a.pdf": b"a", "b.pdf": b"b"}), max_files=1)
+    assert os.listdir(document_storage) == []
+
+
+def test_member_size_counts_decompressed_bytes(document_storage):
+    # Compresses to a few hundred bytes
+    with pytest.raises(UploadTooLargeError, match="big.pdf exceeds"):
+        save_zip_members(
+            archive({"small.pdf": b"ok", "big.pdf": b"0" * 100_000}), max_files=10, max_size=1000
+        )
+    assert os.listdir(document_storage) == []
+
+
+def test_total_size_across_members(document_storage):
+    members = {f"{month}.pdf": b"0" * 600 for month in ("jan", "feb", "mar")}
+
+    with pytest.raises(UploadTooLargeError, match="once decompressed"):
+        save_zip_members(archive(members), max_files=10, max_size=1000, max_total_size=1500)
+    assert os.listdir(document_storage) == []
+
+    stored, _ = save_zip_members(archive(members), max_files=10, max_size=1000, max_total_size=1800)
+    assert sum(f.size for f in stored) == 1800
+
+
+def test_unreadable_archive():
+    with pytest.raises(InvalidBatchUploadError, match="Could not read ZIP archive"):
+        save_zip_members(io.BytesIO(b"not a zip"), max_files=10)
+
+
+def test_hash_upload_rewinds_without_storing(document_storage):
+    upload = UploadFile(io.BytesIO(b"%PDF statement"), filename="statement.pdf")
+
+    size, content_hash = asyncio.run(hash_upload_file(upload, max_size=100))
+
+    assert (size, content_hash) == (14, hashlib.sha256(b"%PDF statement").hexdigest())
+    assert asyncio.run(upload.read()) == b"%PDF statement"
+    assert os.listdir(document_storage) == []
+
+
+def test_hash_upload_size_limit():
+    upload = UploadFile(io.BytesIO(b"0" * 200), filename="statement.pdf")
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(hash_upload_file(upload, max_size=100))
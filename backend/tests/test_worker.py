@@ -0,0 +1,30 @@
+import threading
+
+from app import worker
+
+
+def test_insights_use_the_stored_transactions_and_findings(monkeypatch):
+    calls = []
+
+    def generate_insights(extracted_data, transactions, document_type, anomalies=None):
+        calls.append((extracted_data, transactions, document_type, anomalies))
+        return []
+
+    monkeypatch.setattr(worker, "generate_insights", generate_insights)
+    # Set, so the stage saves no checkpoint
+    cancelled = threading.Event()
+    cancelled.set()
+    pipeline = worker.build_document_pipeline(1, "bank_statement", "statement.pdf", cancelled)
+    results = {
+        "text": "01/03 COFFEE SHOP 4.50",
+        "extracted_data": {"account": "checking"},
+        "transactions": [{"description": "COFFEE SHOP", "amount": 4.5}],
+        "anomalies": [{"type": "fee", "index": 0, "reason": "Fee"}],
+    }
+
+    assert set(pipeline.stages["insights"].depends_on) == {"extracted_data", "transactions", "anomalies"}
+    pipeline.stages["insights"].func(results)
+
+    assert calls == [
+        (results["extracted_data"], results["transactions"], "bank_statement", results["anomalies"])
+    ]